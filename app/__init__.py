@@ -1,15 +1,24 @@
-import firebase_admin
-from fastapi import FastAPI
-from firebase_admin import credentials
+from fastapi import FastAPI, Response
 from starlette.middleware.cors import CORSMiddleware
+from starlette.staticfiles import StaticFiles
 
 from app.config import ROUTER_CONFIGS, settings
-from app.constants import DEFAULT_ROUTER_SETTINGS
+from app.constants import BASE_SLUG, DEFAULT_ROUTER_SETTINGS, MULTIPART_OVERHEAD
 from app.model import CommonResponseModel
-from app.mongo import init_mongo
+from app.mongo import init_mongo, note_search_index
+from app.storage import image_processor, init_storage, upload_executor
+from app.utils import (
+    BodySizeLimitMiddleware,
+    MetricsMiddleware,
+    RequestIdMiddleware,
+    init_logging,
+    logger,
+    metrics_response,
+)
 
 
 def create_app() -> FastAPI:
+    init_logging(settings)
     google_keep_app: FastAPI = FastAPI(
         version=settings.API_VERSION,
         description=settings.API_DESCRIPTION,
@@ -22,6 +31,20 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    google_keep_app.add_middleware(
+        BodySizeLimitMiddleware,
+        max_size=settings.UPLOAD_MAX_SIZE + MULTIPART_OVERHEAD,
+        path=f"{BASE_SLUG}/image",
+    )
+    if settings.STORAGE_BACKEND == "local":
+        google_keep_app.mount(
+            settings.LOCAL_STORAGE_URL,
+            StaticFiles(directory=settings.LOCAL_STORAGE_PATH, check_dir=False),
+            name="media",
+        )
+    google_keep_app.add_middleware(RequestIdMiddleware)
+    # Added last so it is the outermost middleware and times the whole request
+    google_keep_app.add_middleware(MetricsMiddleware)
     return google_keep_app
 
 
@@ -30,9 +53,19 @@ app: FastAPI = create_app()
 
 @app.on_event("startup")
 async def startup_event():
-    cred = credentials.Certificate("creds/firebase.json")
-    firebase_admin.initialize_app(cred, {"storageBucket": "keep-424a4.appspot.com"})
-    await init_mongo(settings)
+    init_storage(settings)
+    app.state.mongo_client = await init_mongo(settings)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    upload_executor.shutdown()
+    image_processor.shutdown()
+    note_search_index.stop()
+    mongo_client = getattr(app.state, "mongo_client", None)
+    if mongo_client is not None:
+        mongo_client.close()
+    logger.shutdown()
 
 
 @app.get(
@@ -59,6 +92,15 @@ async def health() -> CommonResponseModel:
     )
 
 
+@app.get(
+    "/metrics",
+    tags=["Health"],
+    include_in_schema=False,
+)
+async def metrics() -> Response:
+    return metrics_response()
+
+
 for config in ROUTER_CONFIGS.configs:
     app.include_router(
         config.router,
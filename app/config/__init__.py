@@ -1,9 +1,16 @@
 from functools import lru_cache
+from typing import Optional, Union
 
 from dotenv import load_dotenv
-from pydantic import BaseSettings
+from pydantic import BaseSettings, validator
 
 from app.config.router_configs import ROUTER_CONFIGS
+from app.constants import (
+    LOG_FORMAT_LITERAL,
+    LOG_LEVEL_LITERAL,
+    MONGO_READ_PREFERENCE_LITERAL,
+    STORAGE_BACKEND_LITERAL,
+)
 
 load_dotenv()
 
@@ -13,7 +20,41 @@ class Settings(BaseSettings):
     API_TITLE: str = "Google Keep Clone"
     API_DESCRIPTION: str = "Backend API for Google Keep backend built with FastAPI and Docker"
     ALLOWED_HOSTS: list = ["*"]
+    # Colored lines for development, JSON lines written from a background thread for production
+    LOG_FORMAT: LOG_FORMAT_LITERAL = "console"
+    LOG_LEVEL: LOG_LEVEL_LITERAL = "INFO"
+    # Records let through per call site and interval in seconds with the JSON format
+    LOG_RATE_LIMIT: int = 20
+    LOG_RATE_INTERVAL: float = 10.0
+    LOG_QUEUE_SIZE: int = 10000
     MONGO_HOST: str = "mongodb://localhost:27017/GoogleKeepClone"
+    MONGO_DATABASE: str = "GoogleKeepClone"
+    # Connections opened at startup and kept open, so the first requests after a deploy skip the handshake
+    MONGO_MIN_POOL_SIZE: int = 10
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MAX_IDLE_TIME_MS: Optional[int] = None
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: Optional[int] = None
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 30000
+    # Offered to the server in order of preference, snappy needs the python-snappy package
+    MONGO_COMPRESSORS: str = "zstd"
+    MONGO_READ_PREFERENCE: MONGO_READ_PREFERENCE_LITERAL = "primary"
+    # Server default when unset, otherwise a number of members or "majority"
+    MONGO_WRITE_CONCERN: Optional[Union[int, str]] = None
+    STORAGE_BACKEND: STORAGE_BACKEND_LITERAL = "firebase"
+    FIREBASE_CREDENTIALS_PATH: str = "creds/firebase.json"
+    FIREBASE_STORAGE_BUCKET: str = "keep-424a4.appspot.com"
+    LOCAL_STORAGE_PATH: str = "media"
+    LOCAL_STORAGE_URL: str = "/media"
+    UPLOAD_CONCURRENCY: int = 4
+    IMAGE_PROCESSING_WORKERS: int = 2
+    UPLOAD_MAX_SIZE: int = 10 * 1024 * 1024
+    # Firebase resumable uploads need a multiple of 256 KiB
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+
+    @validator("LOG_LEVEL", pre=True)
+    def normalize_log_level(cls, value):  # noqa: N805
+        # Accept the level in any case, an unknown level then fails validation at startup
+        return value.upper() if isinstance(value, str) else value
 
 
 @lru_cache
@@ -1,23 +1,22 @@
-from box import Box
+from types import SimpleNamespace
 
 from app.constants import BASE_SLUG
 from app.router import image_router, labels_router, notes_router
 
-ROUTER_CONFIGS: Box = Box(
-    {
-        "configs": [
-            {
-                "prefix": f"{BASE_SLUG}/notes",
-                "router": notes_router,
-            },
-            {
-                "prefix": f"{BASE_SLUG}/labels",
-                "router": labels_router,
-            },
-            {
-                "prefix": f"{BASE_SLUG}/image",
-                "router": image_router,
-            },
-        ]
-    }
+# A plain namespace rather than a Box, importing python-box alone costs a fifth of a second of cold start
+ROUTER_CONFIGS: SimpleNamespace = SimpleNamespace(
+    configs=[
+        SimpleNamespace(
+            prefix=f"{BASE_SLUG}/notes",
+            router=notes_router,
+        ),
+        SimpleNamespace(
+            prefix=f"{BASE_SLUG}/labels",
+            router=labels_router,
+        ),
+        SimpleNamespace(
+            prefix=f"{BASE_SLUG}/image",
+            router=image_router,
+        ),
+    ]
 )
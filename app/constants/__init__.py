@@ -1,8 +1,54 @@
-from app.constants.app_literals import STATUS_TYPE_LITERAL
+from app.constants.app_literals import (
+    LOG_FORMAT_LITERAL,
+    LOG_LEVEL_LITERAL,
+    MONGO_READ_PREFERENCE_LITERAL,
+    NOTE_VIEW_LITERAL,
+    STATUS_TYPE_LITERAL,
+    STORAGE_BACKEND_LITERAL,
+    TOMBSTONE_KIND_LITERAL,
+)
 from app.model import CommonResponseModel
 
 BASE_SLUG = "/api/v1"
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+STREAM_BATCH_SIZE = 200
+NOTE_PREVIEW_LENGTH = 200
+LABEL_RENAME_BATCH_SIZE = 1000
+LABEL_CACHE_MAX_SIZE = 10000
+LABEL_CACHE_CHECK_INTERVAL = 1.0
+SEARCH_INDEX_CHECK_INTERVAL = 1.0
+# Seconds of updated_at history re-read on every sync of the search index
+SEARCH_INDEX_SYNC_OVERLAP = 5.0
+SEARCH_MIN_PREFIX_LENGTH = 3
+# Seconds a write may take between reserving its change sequence and being visible, including the lease of the block
+# it was reserved from, the delta sync token never moves past a change younger than this
+CHANGES_SETTLE_TIME = 5.0
+# Change sequence values each process reserves with one counter round trip, and seconds it may use them for
+CHANGE_SEQ_BLOCK_SIZE = 100
+CHANGE_SEQ_BLOCK_LEASE = 1.0
+# Seconds tombstones of deleted notes and labels are kept, older change tokens are refused
+CHANGES_TOMBSTONE_TTL = 30 * 24 * 60 * 60
+SEARCH_MAX_PREFIX_EXPANSIONS = 50
+SEARCH_FIELD_WEIGHTS = {
+    "title": 3.0,
+    "labels": 2.0,
+    "notes": 1.0,
+}
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Room for the multipart boundaries and part headers around an uploaded file
+MULTIPART_OVERHEAD = 64 * 1024
+
+# Longest side in pixels of each resized variant generated for uploaded images
+IMAGE_VARIANT_SIZES = {
+    "thumbnail": 256,
+    "medium": 1024,
+}
+IMAGE_VARIANT_QUALITY = 80
+
 DEFAULT_ROUTER_SETTINGS = {
     "response_model_exclude_none": True,
     "response_model": CommonResponseModel,
@@ -10,6 +56,32 @@ DEFAULT_ROUTER_SETTINGS = {
 
 __all__ = [
     "BASE_SLUG",
+    "DEFAULT_PAGE_SIZE",
+    "MAX_PAGE_SIZE",
+    "STREAM_BATCH_SIZE",
+    "NDJSON_MEDIA_TYPE",
+    "MULTIPART_OVERHEAD",
+    "IMAGE_VARIANT_SIZES",
+    "IMAGE_VARIANT_QUALITY",
+    "NOTE_PREVIEW_LENGTH",
+    "LABEL_RENAME_BATCH_SIZE",
+    "LABEL_CACHE_MAX_SIZE",
+    "LABEL_CACHE_CHECK_INTERVAL",
+    "SEARCH_INDEX_CHECK_INTERVAL",
+    "SEARCH_INDEX_SYNC_OVERLAP",
+    "SEARCH_MIN_PREFIX_LENGTH",
+    "CHANGES_SETTLE_TIME",
+    "CHANGE_SEQ_BLOCK_SIZE",
+    "CHANGE_SEQ_BLOCK_LEASE",
+    "CHANGES_TOMBSTONE_TTL",
+    "SEARCH_MAX_PREFIX_EXPANSIONS",
+    "SEARCH_FIELD_WEIGHTS",
     "STATUS_TYPE_LITERAL",
+    "NOTE_VIEW_LITERAL",
+    "STORAGE_BACKEND_LITERAL",
+    "TOMBSTONE_KIND_LITERAL",
+    "MONGO_READ_PREFERENCE_LITERAL",
+    "LOG_FORMAT_LITERAL",
+    "LOG_LEVEL_LITERAL",
     "DEFAULT_ROUTER_SETTINGS",
 ]
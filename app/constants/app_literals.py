@@ -1,3 +1,15 @@
 from typing import Literal
 
-STATUS_TYPE_LITERAL = Literal["success", "error"]
+STATUS_TYPE_LITERAL = Literal["success", "error", "failure"]
+
+NOTE_VIEW_LITERAL = Literal["full", "summary"]
+
+STORAGE_BACKEND_LITERAL = Literal["firebase", "local"]
+
+TOMBSTONE_KIND_LITERAL = Literal["note", "label"]
+
+LOG_FORMAT_LITERAL = Literal["console", "json"]
+
+LOG_LEVEL_LITERAL = Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
+
+MONGO_READ_PREFERENCE_LITERAL = Literal["primary", "primaryPreferred", "secondary", "secondaryPreferred", "nearest"]
@@ -1,27 +1,32 @@
+from beanie.exceptions import CollectionWasNotInitialized, DocumentWasNotSaved
 from fastapi import UploadFile
-from firebase_admin import storage
-from firebase_admin.exceptions import FirebaseError, InternalError, UnknownError
 
+from app.database import ImageDatabase
 from app.model import CommonResponseModel
+from app.storage import StorageError
 from app.utils import logger
 
 
 class ImageController:
     @staticmethod
-    def upload(file: UploadFile) -> CommonResponseModel:
+    async def upload(file: UploadFile) -> CommonResponseModel:
         try:
-            bucket = storage.bucket()
-            blob = bucket.blob(file.filename)
-            blob.upload_from_file(file.file)
+            image = await ImageDatabase.upload(file)
             return CommonResponseModel(
                 status="success",
                 message="Image uploaded successfully",
                 data={
-                    "image_url": blob.public_url,
+                    "image_url": image.url,
+                    "image_id": image.id,
+                    **{f"{name}_url": variant_url for name, variant_url in image.variants.items()},
                 },
             )
-        except (FirebaseError, UnknownError, InternalError) as firebase_error:
+        except (
+            StorageError,
+            DocumentWasNotSaved,
+            CollectionWasNotInitialized,
+        ) as storage_error:
             logger.error(
-                f"Error while uploading image: {firebase_error}",
+                f"Error while uploading image: {storage_error}",
             )
-            raise firebase_error
+            raise storage_error
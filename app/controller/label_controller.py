@@ -1,9 +1,13 @@
+from typing import Optional
+
 from beanie import PydanticObjectId
 from beanie.exceptions import CollectionWasNotInitialized, DocumentWasNotSaved
+from starlette.responses import StreamingResponse
 
-from app.database import LabelDatabase
+from app.constants import NOTE_VIEW_LITERAL
+from app.database import LabelDatabase, NotesDatabase
 from app.model import CommonResponseModel, UpdateLabelRequestModel
-from app.utils import logger
+from app.utils import logger, make_etag, ndjson_response
 
 
 class LabelController:
@@ -24,12 +28,34 @@ class LabelController:
             raise beanie_exception
 
     @staticmethod
-    async def get_all_notes_by_label_id(label_id: PydanticObjectId) -> CommonResponseModel:
+    async def get_labels_etag() -> str:
+        """
+        ETag of the labels listing, derived from the labels version
+        """
+        return make_etag("labels", await LabelDatabase.get_version())
+
+    @staticmethod
+    async def get_label_notes_etag(*query_params) -> Optional[str]:
+        """
+        ETag of the notes listing of a label, derived from the notes version and the query shaping the listing.
+        None while the notes version has not settled.
+        """
+        version = await NotesDatabase.get_version()
+        if version is None:
+            return None
+        return make_etag("label_notes", version, *query_params)
+
+    @staticmethod
+    async def get_all_notes_by_label_id(
+        label_id: PydanticObjectId,
+        view: NOTE_VIEW_LITERAL,
+        fields: Optional[str],
+    ) -> CommonResponseModel:
         """
         Get all notes for each label
         """
         try:
-            notes = await LabelDatabase.get_all_notes_by_label_id(label_id)
+            notes = await LabelDatabase.get_all_notes_by_label_id(label_id, view, fields)
             return CommonResponseModel(
                 status="success",
                 message="Notes fetched successfully",
@@ -39,17 +65,28 @@ class LabelController:
             logger.error(f"Error while fetching notes for label: {beanie_exception}")
             raise beanie_exception
 
+    @staticmethod
+    def stream_notes_by_label_id(
+        label_id: PydanticObjectId,
+        view: NOTE_VIEW_LITERAL,
+        fields: Optional[str],
+    ) -> StreamingResponse:
+        """
+        Stream all notes for each label as newline delimited JSON
+        """
+        return ndjson_response(LabelDatabase.stream_notes_by_label_id(label_id, view, fields))
+
     @staticmethod
     async def update(request: UpdateLabelRequestModel) -> CommonResponseModel:
         """
         Edit an existing labels
         """
         try:
-            labels = await LabelDatabase.update(request)
+            modified_count = await LabelDatabase.update(request)
             return CommonResponseModel(
                 status="success",
                 message="Label updated successfully",
-                data=labels,
+                data={"modified_count": modified_count},
             )
         except (DocumentWasNotSaved, CollectionWasNotInitialized) as beanie_exception:
             logger.error(f"Error while updating label: {beanie_exception}")
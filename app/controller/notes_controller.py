@@ -1,15 +1,20 @@
+from typing import Optional
+
 from beanie import PydanticObjectId
 from beanie.exceptions import CollectionWasNotInitialized, DocumentWasNotSaved
+from starlette.responses import StreamingResponse
 
-from app.database import NotesDatabase
+from app.constants import NOTE_VIEW_LITERAL
+from app.database import ChangesDatabase, NotesDatabase
 from app.model import (
+    BatchNoteRequestModel,
+    BulkNoteRequestModel,
     CommonResponseModel,
     CreateNoteModel,
     DeleteLabelFromNoteModel,
     UpdateNoteModel,
 )
-from app.mongo import NoteDocument
-from app.utils import logger
+from app.utils import logger, make_etag, ndjson_response
 
 
 class NotesController:
@@ -62,22 +67,81 @@ class NotesController:
             raise beanie_exception
 
     @staticmethod
-    async def get_all_notes(get_trash: bool, get_pinned: bool, get_archived: bool) -> CommonResponseModel:
+    async def get_notes_etag(*query_params) -> Optional[str]:
+        """
+        ETag of a notes listing, derived from the notes version and the query shaping the listing.
+        None while the notes version has not settled, the listing is then sent without an ETag.
+        """
+        version = await NotesDatabase.get_version()
+        if version is None:
+            return None
+        return make_etag("notes", version, *query_params)
+
+    @staticmethod
+    async def get_all_notes(
+        get_trash: bool,
+        get_pinned: bool,
+        get_archived: bool,
+        limit: int,
+        cursor: Optional[str],
+        view: NOTE_VIEW_LITERAL,
+        fields: Optional[str],
+    ) -> CommonResponseModel:
         """
-        Get all notes based on active status
+        Get a page of notes based on active status
         """
         try:
-            notes: list[NoteDocument] = await NotesDatabase.get_all_notes(get_trash, get_pinned, get_archived)
+            notes, next_cursor = await NotesDatabase.get_all_notes(
+                get_trash,
+                get_pinned,
+                get_archived,
+                limit,
+                cursor,
+                view,
+                fields,
+            )
             response = CommonResponseModel(
                 status="success",
                 message="Notes fetched successfully",
                 data=notes,
+                next_cursor=next_cursor,
             )
             return response
         except (DocumentWasNotSaved, CollectionWasNotInitialized) as beanie_exception:
             logger.error(f"Error while fetching notes: {beanie_exception}")
             raise beanie_exception
 
+    @staticmethod
+    async def get_changes(since: Optional[str], limit: int) -> CommonResponseModel:
+        """
+        Get the notes and labels changed since a change token and the ids of the deleted ones
+        """
+        try:
+            changes, next_token = await ChangesDatabase.get_changes(since, limit)
+            return CommonResponseModel(
+                status="success",
+                message="Changes fetched successfully",
+                data=changes,
+                next_cursor=next_token,
+            )
+        except (DocumentWasNotSaved, CollectionWasNotInitialized) as beanie_exception:
+            logger.error(f"Error while fetching changes: {beanie_exception}")
+            raise beanie_exception
+
+    @staticmethod
+    def stream_all_notes(
+        get_trash: bool,
+        get_pinned: bool,
+        get_archived: bool,
+        cursor: Optional[str],
+        view: NOTE_VIEW_LITERAL,
+        fields: Optional[str],
+    ) -> StreamingResponse:
+        """
+        Stream all notes based on active status as newline delimited JSON
+        """
+        return ndjson_response(NotesDatabase.stream_notes(get_trash, get_pinned, get_archived, cursor, view, fields))
+
     @staticmethod
     async def delete_label_from_note(request: DeleteLabelFromNoteModel) -> CommonResponseModel:
         """
@@ -130,20 +194,145 @@ class NotesController:
             raise beanie_exception
 
     @staticmethod
-    async def search_note(search_text: str) -> CommonResponseModel:
+    async def batch(request: BatchNoteRequestModel) -> CommonResponseModel:
         """
-        Search notes
+        Apply a batch of create, update and delete operations
         """
         try:
-            notes: list[NoteDocument] = await NotesDatabase.search_notes(
+            results = await NotesDatabase.batch(request.operations)
+            response = CommonResponseModel(
+                status="success",
+                message="Notes batch applied successfully",
+                data=results,
+            )
+            return response
+        except (DocumentWasNotSaved, CollectionWasNotInitialized) as beanie_exception:
+            logger.error(f"Error while applying notes batch: {beanie_exception}")
+            raise beanie_exception
+
+    @staticmethod
+    async def delete_notes(request: BulkNoteRequestModel, is_permanent: bool) -> CommonResponseModel:
+        """
+        Delete multiple notes
+        """
+        try:
+            modified_count = await NotesDatabase.delete_notes(request.note_ids, is_permanent)
+            response = CommonResponseModel(
+                status="success",
+                message="Notes deleted successfully",
+                data={"modified_count": modified_count},
+            )
+            return response
+        except (DocumentWasNotSaved, CollectionWasNotInitialized) as beanie_exception:
+            logger.error(f"Error while deleting notes: {beanie_exception}")
+            raise beanie_exception
+
+    @staticmethod
+    async def pin_notes(request: BulkNoteRequestModel, unpin: bool) -> CommonResponseModel:
+        """
+        Pin multiple notes
+        """
+        try:
+            modified_count = await NotesDatabase.pin_notes(request.note_ids, unpin)
+            response = CommonResponseModel(
+                status="success",
+                message="Notes pinned successfully",
+                data={"modified_count": modified_count},
+            )
+            return response
+        except (DocumentWasNotSaved, CollectionWasNotInitialized) as beanie_exception:
+            logger.error(f"Error while pinning notes: {beanie_exception}")
+            raise beanie_exception
+
+    @staticmethod
+    async def archive_notes(request: BulkNoteRequestModel, un_archive: bool) -> CommonResponseModel:
+        """
+        Archive multiple notes
+        """
+        try:
+            modified_count = await NotesDatabase.archive_notes(request.note_ids, un_archive)
+            response = CommonResponseModel(
+                status="success",
+                message="Notes archived successfully",
+                data={"modified_count": modified_count},
+            )
+            return response
+        except (DocumentWasNotSaved, CollectionWasNotInitialized) as beanie_exception:
+            logger.error(f"Error while archiving notes: {beanie_exception}")
+            raise beanie_exception
+
+    @staticmethod
+    async def search_note(
+        search_text: str,
+        limit: int,
+        cursor: Optional[str],
+        pinned: Optional[bool],
+        archived: Optional[bool],
+        label_id: Optional[PydanticObjectId],
+        view: NOTE_VIEW_LITERAL,
+        fields: Optional[str],
+    ) -> CommonResponseModel:
+        """
+        Search notes, most relevant first
+        """
+        try:
+            notes, next_cursor = await NotesDatabase.search_notes(
                 search_text=search_text,
+                limit=limit,
+                cursor=cursor,
+                pinned=pinned,
+                archived=archived,
+                label_id=label_id,
+                view=view,
+                fields=fields,
             )
             response = CommonResponseModel(
                 status="success",
                 message="Note searched and retried successfully",
                 data=notes,
+                next_cursor=next_cursor,
             )
             return response
         except (DocumentWasNotSaved, CollectionWasNotInitialized) as beanie_exception:
             logger.error(f"Error while archiving note: {beanie_exception}")
             raise beanie_exception
+
+    @staticmethod
+    async def suggest_notes(
+        search_text: str,
+        limit: int,
+        cursor: Optional[str],
+        view: NOTE_VIEW_LITERAL,
+        fields: Optional[str],
+    ) -> CommonResponseModel:
+        """
+        Search notes as you type, ranked and paginated
+        """
+        try:
+            notes, next_cursor = await NotesDatabase.suggest_notes(search_text, limit, cursor, view, fields)
+            return CommonResponseModel(
+                status="success",
+                message="Notes suggested successfully",
+                data=notes,
+                next_cursor=next_cursor,
+            )
+        except (DocumentWasNotSaved, CollectionWasNotInitialized) as beanie_exception:
+            logger.error(f"Error while suggesting notes: {beanie_exception}")
+            raise beanie_exception
+
+    @staticmethod
+    def stream_search_note(
+        search_text: str,
+        cursor: Optional[str],
+        pinned: Optional[bool],
+        archived: Optional[bool],
+        label_id: Optional[PydanticObjectId],
+        view: NOTE_VIEW_LITERAL,
+        fields: Optional[str],
+    ) -> StreamingResponse:
+        """
+        Stream searched notes as newline delimited JSON, most relevant first
+        """
+        return ndjson_response(
+            NotesDatabase.stream_search_notes(search_text, cursor, pinned, archived, label_id, view, fields)
+        )
@@ -1,4 +1,6 @@
-from app.database.label_database import LabelDatabase
+from app.database.changes_database import ChangesDatabase
+from app.database.image_database import ImageDatabase
+from app.database.label_database import LabelDatabase, LabelNameTakenError
 from app.database.notes_database import NotesDatabase
 
-__all__ = ["NotesDatabase", "LabelDatabase"]
+__all__ = ["NotesDatabase", "LabelDatabase", "ImageDatabase", "ChangesDatabase", "LabelNameTakenError"]
@@ -0,0 +1,117 @@
+import asyncio
+import heapq
+import itertools
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
+
+import pymongo
+from beanie import PydanticObjectId
+from beanie.exceptions import CollectionWasNotInitialized, DocumentWasNotSaved
+
+from app.constants import CHANGES_SETTLE_TIME, CHANGES_TOMBSTONE_TTL, DEFAULT_PAGE_SIZE
+from app.database.label_database import LABEL_PROJECTION
+from app.database.projections import compact, note_projection
+from app.mongo import LabelDocument, NoteDocument, TombstoneDocument
+from app.utils import (
+    InvalidQueryError,
+    decode_change_token,
+    encode_change_token,
+    logger,
+)
+
+LABEL_CHANGE_PROJECTION = {**LABEL_PROJECTION, "change_seq": 1}
+TOMBSTONE_PROJECTION = {"kind": 1, "change_seq": 1, "deleted_at": 1}
+CHANGE_SORT = [("change_seq", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)]
+
+
+class ChangesDatabase:
+    @staticmethod
+    def _changes_after(change_seq: int, document_id: Optional[PydanticObjectId]) -> dict:
+        """
+        Filter selecting the documents strictly after a position in (change_seq, _id) order
+        """
+        if document_id is None:
+            return {"change_seq": {"$gt": change_seq}}
+        return {
+            "$or": [
+                {"change_seq": {"$gt": change_seq}},
+                {"change_seq": change_seq, "_id": {"$gt": document_id}},
+            ]
+        }
+
+    @staticmethod
+    def _tag_changes(documents: list[dict], key: Optional[str]) -> Iterator[tuple]:
+        """
+        (change_seq, _id, changed at, response key, value) of each document, tombstones are reported by id
+        """
+        for document in documents:
+            if key is None:
+                yield (
+                    document["change_seq"],
+                    document["_id"],
+                    document["deleted_at"],
+                    f"deleted_{document['kind']}s",
+                    document["_id"],
+                )
+            else:
+                yield document["change_seq"], document["_id"], document.get("updated_at"), key, compact(document)
+
+    @staticmethod
+    async def get_changes(since: Optional[str], limit: int = DEFAULT_PAGE_SIZE) -> tuple[dict, str]:
+        """
+        The first `limit` notes, labels and tombstones after the position of the `since` token in (change_seq, _id)
+        order, along with the token of the next call.
+        The token only moves past changes older than the settle time, so a write that reserved its sequence number
+        before another one but became visible after it is still returned. Younger changes come again on the next call.
+        """
+        try:
+            now = datetime.utcnow()
+            change_seq, document_id = -1, None
+            if since:
+                change_seq, document_id, issued_at = decode_change_token(since)
+                # The tombstones deleted since the token was handed out may have expired
+                if now - issued_at > timedelta(seconds=CHANGES_TOMBSTONE_TTL - CHANGES_SETTLE_TIME):
+                    raise InvalidQueryError("Change token expired, sync again without since")
+
+            changes_filter = ChangesDatabase._changes_after(change_seq, document_id)
+            notes, labels, tombstones = await asyncio.gather(
+                *(
+                    collection.find(changes_filter, projection, sort=CHANGE_SORT).to_list(limit + 1)
+                    for collection, projection in (
+                        (NoteDocument.get_motor_collection(), note_projection("full", None)),
+                        (LabelDocument.get_motor_collection(), LABEL_CHANGE_PROJECTION),
+                        (TombstoneDocument.get_motor_collection(), TOMBSTONE_PROJECTION),
+                    )
+                )
+            )
+            changes = list(
+                itertools.islice(
+                    heapq.merge(
+                        ChangesDatabase._tag_changes(notes, "notes"),
+                        ChangesDatabase._tag_changes(labels, "labels"),
+                        ChangesDatabase._tag_changes(tombstones, None),
+                        key=lambda change: change[:2],
+                    ),
+                    limit + 1,
+                )
+            )
+            page = changes[:limit]
+
+            settled_before = now - timedelta(seconds=CHANGES_SETTLE_TIME)
+            settled_count = 0
+            for _, _, changed_at, _, _ in page:
+                if changed_at is not None and changed_at >= settled_before:
+                    break
+                settled_count += 1
+            if settled_count:
+                change_seq, document_id = page[settled_count - 1][:2]
+
+            data: dict = {"notes": [], "labels": [], "deleted_notes": [], "deleted_labels": []}
+            for _, _, _, key, value in page:
+                data[key].append(value)
+            # Only worth calling again right away when the token moved to the end of a full page
+            data["has_more"] = len(changes) > limit and settled_count == len(page)
+            return data, encode_change_token(change_seq, document_id, now)
+        except (DocumentWasNotSaved, CollectionWasNotInitialized) as beanie_exception:
+            logger.error(f"Error while getting changes: {beanie_exception}")
+            raise beanie_exception
@@ -0,0 +1,108 @@
+import asyncio
+import re
+from pathlib import PurePath
+from typing import BinaryIO, Optional
+
+from beanie.exceptions import CollectionWasNotInitialized, DocumentWasNotSaved
+from fastapi import UploadFile
+from pymongo.errors import DuplicateKeyError
+
+from app.mongo import ImageDocument
+from app.storage import VARIANT_CONTENT_TYPE, image_processor, upload_executor
+from app.utils import logger
+
+IMAGE_KEY_PREFIX = "images"
+
+
+class ImageDatabase:
+    # Uploads in flight by content hash, so concurrent uploads of the same image share a single transfer
+    _pending_uploads: dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def _get_key(digest: str, filename: Optional[str]) -> str:
+        """
+        Content addressed storage key, keeping the extension of the uploaded file so the object is served with it
+        """
+        suffix = PurePath(filename or "").suffix.lower()
+        if not re.fullmatch(r"\.[a-z0-9]{1,10}", suffix):
+            suffix = ""
+        return f"{IMAGE_KEY_PREFIX}/{digest}{suffix}"
+
+    @staticmethod
+    async def upload(file: UploadFile) -> ImageDocument:
+        """
+        Store the image under the hash of its content, an image that was already stored is not transferred again
+        """
+        try:
+            digest, size = await upload_executor.digest(file.file)
+            image = await ImageDocument.get(digest)
+            if image is not None:
+                return image
+            # The shared upload outlives this request, whose file Starlette closes once it ends, so it works on a copy
+            spooled_file = await upload_executor.spool(file.file)
+            # Looked up after spooling, nothing is awaited between the lookup and the registration of a new upload
+            pending_upload = ImageDatabase._pending_uploads.get(digest)
+            if pending_upload is not None:
+                spooled_file.close()
+                return await asyncio.shield(pending_upload)
+            pending_upload = asyncio.ensure_future(
+                ImageDatabase._store(digest, size, spooled_file, file.filename, file.content_type)
+            )
+            ImageDatabase._pending_uploads[digest] = pending_upload
+            try:
+                return await asyncio.shield(pending_upload)
+            finally:
+                if pending_upload.done():
+                    ImageDatabase._pending_uploads.pop(digest, None)
+                else:
+                    pending_upload.add_done_callback(lambda _: ImageDatabase._pending_uploads.pop(digest, None))
+        except (DocumentWasNotSaved, CollectionWasNotInitialized) as beanie_exception:
+            logger.error(f"Error while registering image: {beanie_exception}")
+            raise beanie_exception
+
+    @staticmethod
+    async def _store(
+        digest: str,
+        size: int,
+        file: BinaryIO,
+        filename: Optional[str],
+        content_type: Optional[str],
+    ) -> ImageDocument:
+        """
+        Store the original and its resized variants, then register the image. Closes the file it is given.
+        """
+        key = ImageDatabase._get_key(digest, filename)
+        try:
+            variants = await image_processor.render(await upload_executor.read(file))
+            if not variants:
+                logger.warning(f"No resized variants generated for {filename}, not a decodable image")
+            # Every upload is waited for before the file is closed, the original may still be streaming from it
+            urls = await asyncio.gather(
+                upload_executor.upload(key, file, content_type),
+                *[
+                    upload_executor.upload_bytes(f"{IMAGE_KEY_PREFIX}/{digest}_{name}.webp", data, VARIANT_CONTENT_TYPE)
+                    for name, data in variants.items()
+                ],
+                return_exceptions=True,
+            )
+        finally:
+            file.close()
+        for result in urls:
+            if isinstance(result, BaseException):
+                raise result
+        url, *variant_urls = urls
+        image = ImageDocument(
+            id=digest,
+            url=url,
+            key=key,
+            size=size,
+            content_type=content_type,
+            filename=filename,
+            variants=dict(zip(variants, variant_urls)),
+        )
+        try:
+            await image.insert()
+        except DuplicateKeyError:
+            # Another process registered the same content first, both wrote the same object
+            image = await ImageDocument.get(digest)
+        return image
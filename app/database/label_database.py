@@ -1,37 +1,114 @@
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
 from beanie import PydanticObjectId
-from beanie.exceptions import CollectionWasNotInitialized, DocumentWasNotSaved
+from beanie.exceptions import (
+    CollectionWasNotInitialized,
+    DocumentWasNotSaved,
+    RevisionIdWasChanged,
+)
 
+from app.constants import NOTE_VIEW_LITERAL, STREAM_BATCH_SIZE
+from app.database.projections import compact, compact_documents, note_projection
 from app.model import UpdateLabelRequestModel
-from app.mongo import LabelDocument, NoteDocument
+from app.mongo import LabelDocument, NoteDocument, label_cache
 from app.utils import logger
 
+LABEL_PROJECTION = {"label": 1, "created_at": 1, "updated_at": 1}
+
+
+class LabelNameTakenError(ValueError):
+    """
+    Raised when a label is renamed to the name of another label
+    """
+
 
 class LabelDatabase:
     @staticmethod
-    async def get_all_labels() -> list[LabelDocument]:
+    async def get_all_labels() -> list[dict]:
+        """
+        Get every label with the fields of LABEL_PROJECTION, whether served from the label cache or from Mongo
+        """
         try:
-            labels = await LabelDocument.find_all().to_list()
-            return labels
+            cached_labels = await label_cache.get_all()
+            if cached_labels is None:
+                return await LabelDocument.get_motor_collection().find({}, LABEL_PROJECTION).to_list(None)
+            return [
+                {"_id": label.id, **{field_name: getattr(label, field_name) for field_name in LABEL_PROJECTION}}
+                for label in cached_labels
+            ]
         except (DocumentWasNotSaved, CollectionWasNotInitialized) as beanie_exception:
             logger.error("Error while getting all labels: {beanie_exception}")
             raise beanie_exception
 
     @staticmethod
-    async def get_all_notes_by_label_id(label_id: PydanticObjectId) -> list[NoteDocument]:
+    async def get_version() -> int:
+        """
+        Version of the Labels collection, bumped after every write
+        """
+        return await LabelDocument.get_version()
+
+    @staticmethod
+    async def get_all_notes_by_label_id(
+        label_id: PydanticObjectId,
+        view: NOTE_VIEW_LITERAL = "full",
+        fields: Optional[str] = None,
+    ) -> list[dict]:
         try:
-            notes = await NoteDocument.find({"label_ids": label_id}).to_list()
-            return notes
+            notes = (
+                await NoteDocument.get_motor_collection()
+                .find(
+                    {"label_ids": label_id},
+                    note_projection(view, fields),
+                )
+                .to_list(None)
+            )
+            return [compact(note) for note in notes]
         except (DocumentWasNotSaved, CollectionWasNotInitialized) as beanie_exception:
             logger.error("Error while getting all labels: {beanie_exception}")
             raise beanie_exception
 
     @staticmethod
-    async def update(request: UpdateLabelRequestModel) -> None:
+    def stream_notes_by_label_id(
+        label_id: PydanticObjectId,
+        view: NOTE_VIEW_LITERAL = "full",
+        fields: Optional[str] = None,
+    ) -> AsyncIterator[dict]:
+        """
+        Iterate the notes of a label, fetching them from Mongo in batches
+        """
+        return compact_documents(
+            NoteDocument.get_motor_collection().find(
+                {"label_ids": label_id},
+                note_projection(view, fields),
+                batch_size=STREAM_BATCH_SIZE,
+            )
+        )
+
+    @staticmethod
+    async def update(request: UpdateLabelRequestModel) -> int:
+        """
+        Rename a label and return how many notes were updated with the new name.
+        The label is renamed before its notes, so a name taken by another label is rejected before any note changes.
+        Notes left with the old name by an interrupted rename are not picked up by a later request.
+        """
         try:
             label = await LabelDocument.find_one({"_id": request.label_id})
-            if label:
-                label.label = request.label_name
-                await label.save()
+            if label is None or label.label == request.label_name:
+                return 0
+            if await LabelDocument.find_one({"label": request.label_name}) is not None:
+                raise LabelNameTakenError(f"Label {request.label_name} already exists")
+            previous_name = label.label
+            label.label = request.label_name
+            label.updated_at = datetime.utcnow()
+            try:
+                await label.save(skip_actions=["update_notes"])
+            except RevisionIdWasChanged as revision_error:
+                # Another request took the name between the lookup and the save, beanie reports the DuplicateKeyError
+                # of the unique label index as a changed revision
+                raise LabelNameTakenError(f"Label {request.label_name} already exists") from revision_error
+            modified_count = await LabelDocument.rename_in_notes(previous_name, request.label_name)
+            return modified_count
         except (DocumentWasNotSaved, CollectionWasNotInitialized) as beanie_exception:
             logger.error(f"Error while updating label: {beanie_exception}")
             raise beanie_exception
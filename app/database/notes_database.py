@@ -1,3 +1,6 @@
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
 import pymongo
 from beanie import PydanticObjectId
 from beanie.exceptions import (
@@ -5,10 +8,54 @@ from beanie.exceptions import (
     DocumentNotFound,
     DocumentWasNotSaved,
 )
+from beanie.odm.utils.dump import get_dict
+from motor.motor_asyncio import AsyncIOMotorCursor
+from pydantic import ValidationError
+from pymongo import DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
 
-from app.model import CreateNoteModel, DeleteLabelFromNoteModel, UpdateNoteModel
-from app.mongo import LabelDocument, NoteDocument
-from app.utils import logger
+from app.constants import DEFAULT_PAGE_SIZE, NOTE_VIEW_LITERAL, STREAM_BATCH_SIZE
+from app.database.projections import (
+    compact,
+    compact_documents,
+    note_projection,
+    note_search_projection,
+)
+from app.model import (
+    CreateNoteModel,
+    DeleteLabelFromNoteModel,
+    NoteOperationModel,
+    UpdateNoteModel,
+)
+from app.mongo import (
+    NOTES_ORDER_COUNTER,
+    CounterDocument,
+    LabelDocument,
+    NoteDocument,
+    TombstoneDocument,
+    change_seq_allocator,
+    label_cache,
+    note_search_index,
+)
+from app.utils import (
+    InvalidQueryError,
+    decode_cursor,
+    encode_cursor,
+    keyset_filter,
+    logger,
+)
+
+# Tag of the suggestion cursors handed out by the text index fallback
+TEXT_INDEX_CURSOR = "text"
+
+NOTE_UPDATE_FIELDS = (
+    "title",
+    "notes",
+    "labels",
+    "images",
+    "background_color_index",
+    "background_image_index",
+)
 
 
 class NotesDatabase:
@@ -23,109 +70,325 @@ class NotesDatabase:
             logger.error(f"Error while creating note: {beanie_exception}")
             raise beanie_exception
 
+    @staticmethod
+    def _get_changes(current_note: dict, request: UpdateNoteModel) -> dict:
+        """
+        Coerce the request to the stored field types and keep only the fields that differ from the stored note
+        """
+        values = request.dict(include=set(NOTE_UPDATE_FIELDS))
+        values["labels"] = values["labels"] or []
+        changes = {}
+        for field_name, value in values.items():
+            value, error = NoteDocument.__fields__[field_name].validate(value, {}, loc=field_name)
+            if error:
+                raise ValidationError([error], NoteDocument)
+            if value != current_note.get(field_name):
+                changes[field_name] = value
+        return changes
+
     @staticmethod
     async def update(request: UpdateNoteModel) -> None:
         """
-        Updating an existing note
+        Updating an existing note by writing only the fields that changed
         """
         try:
-            note_object = await NoteDocument.find_one({"_id": request.note_id})
-            for label in request.labels:
-                if label not in note_object.labels:
-                    label_object = await LabelDocument(label=label).insert()
-                    note_object.label_ids.append(label_object.id)
-            for label in note_object.labels:
-                if label not in request.labels:
-                    label_object = await LabelDocument.find_one({"label": label})
-                    if label_object:
-                        note_object.label_ids.remove(label_object.id)
-
-            note_object.title = request.title
-            note_object.notes = request.notes
-            note_object.labels = request.labels
-            note_object.images = request.images
-            note_object.background_color_index = request.background_color_index
-            note_object.background_image_index = request.background_image_index
-            await note_object.save()
+            collection = NoteDocument.get_motor_collection()
+            current_note = await collection.find_one(
+                {"_id": request.note_id},
+                {field_name: 1 for field_name in NOTE_UPDATE_FIELDS},
+            )
+            if current_note is None:
+                raise DocumentNotFound(f"Note {request.note_id} not found")
+            changes = NotesDatabase._get_changes(current_note, request)
+            if not changes:
+                return
+            if "labels" in changes:
+                # labels and label_ids change together, and $addToSet and $pull cannot target the same field in one
+                # update, so both arrays are set to their new values
+                label_ids = await LabelDocument.resolve_ids(changes["labels"])
+                changes["label_ids"] = list(dict.fromkeys(label_ids[label] for label in changes["labels"]))
+            changes["updated_at"] = datetime.utcnow()
+            changes["change_seq"] = await change_seq_allocator.next_value()
+            await collection.update_one({"_id": request.note_id}, {"$set": changes})
+            NoteDocument.mark_changed()
         except (DocumentWasNotSaved, CollectionWasNotInitialized, DocumentNotFound) as beanie_exception:
             logger.error(f"Error while updating note: {beanie_exception}")
             raise beanie_exception
 
+    @staticmethod
+    async def batch(operations: list[NoteOperationModel]) -> list[dict]:
+        """
+        Apply a mixed list of create, update and delete operations with one unordered bulk write.
+        Operations are not applied in order, updates are diffed against the notes as stored before the batch.
+        """
+        try:
+            collection = NoteDocument.get_motor_collection()
+            now = datetime.utcnow()
+            results: list[dict] = [
+                {"index": index, "op": operation.op, "status": "success"} for index, operation in enumerate(operations)
+            ]
+
+            labels = [
+                label
+                for operation in operations
+                if operation.op in ("create", "update")
+                for label in operation.note.labels or []
+            ]
+            label_ids = await LabelDocument.resolve_ids(labels)
+
+            create_count = sum(operation.op == "create" for operation in operations)
+            next_order = 0
+            if create_count:
+                next_order = await CounterDocument.next_value(NOTES_ORDER_COUNTER, step=create_count) - create_count + 1
+
+            # Every note written by the batch shares one position in the change sequence
+            change_seq = await change_seq_allocator.next_value()
+
+            update_ids = [operation.note.note_id for operation in operations if operation.op == "update"]
+            current_notes = {}
+            if update_ids:
+                async for current_note in collection.find(
+                    {"_id": {"$in": update_ids}},
+                    {field_name: 1 for field_name in NOTE_UPDATE_FIELDS},
+                ):
+                    current_notes[current_note["_id"]] = current_note
+
+            # Only the notes that exist before the batch leave a tombstone when deleted permanently
+            delete_ids = [
+                operation.note_id for operation in operations if operation.op == "delete" and operation.is_permanent
+            ]
+            existing_delete_ids = set()
+            if delete_ids:
+                async for deleted_note in collection.find({"_id": {"$in": delete_ids}}, {"_id": 1}):
+                    existing_delete_ids.add(deleted_note["_id"])
+
+            requests, request_indexes = [], []
+            for index, operation in enumerate(operations):
+                if operation.op == "create":
+                    note = NoteDocument(
+                        **operation.note.dict(),
+                        id=PydanticObjectId(),
+                        order=next_order,
+                        created_at=now,
+                        updated_at=now,
+                        change_seq=change_seq,
+                    )
+                    note.label_ids = list(dict.fromkeys(label_ids[label] for label in note.labels or []))
+                    next_order += 1
+                    results[index]["note_id"] = note.id
+                    requests.append(InsertOne(get_dict(note, to_db=True)))
+                elif operation.op == "update":
+                    results[index]["note_id"] = operation.note.note_id
+                    current_note = current_notes.get(operation.note.note_id)
+                    if current_note is None:
+                        results[index].update(status="error", error="Note not found")
+                        continue
+                    changes = NotesDatabase._get_changes(current_note, operation.note)
+                    if not changes:
+                        continue
+                    if "labels" in changes:
+                        changes["label_ids"] = list(dict.fromkeys(label_ids[label] for label in changes["labels"]))
+                    changes["updated_at"] = now
+                    changes["change_seq"] = change_seq
+                    requests.append(UpdateOne({"_id": operation.note.note_id}, {"$set": changes}))
+                else:
+                    results[index]["note_id"] = operation.note_id
+                    if operation.is_permanent:
+                        requests.append(DeleteOne({"_id": operation.note_id}))
+                    else:
+                        requests.append(
+                            UpdateOne(
+                                {"_id": operation.note_id, "active": {"$ne": False}},
+                                {"$set": {"active": False, "updated_at": now, "change_seq": change_seq}},
+                            )
+                        )
+                request_indexes.append(index)
+
+            if requests:
+                try:
+                    await collection.bulk_write(requests, ordered=False)
+                except BulkWriteError as bulk_write_error:
+                    for write_error in bulk_write_error.details["writeErrors"]:
+                        results[request_indexes[write_error["index"]]].update(
+                            status="error",
+                            error=write_error["errmsg"],
+                        )
+                await TombstoneDocument.record(
+                    "note",
+                    [
+                        result["note_id"]
+                        for result in results
+                        if result["op"] == "delete"
+                        and result["status"] == "success"
+                        and result["note_id"] in existing_delete_ids
+                    ],
+                )
+                NoteDocument.mark_changed()
+            return results
+        except (DocumentWasNotSaved, CollectionWasNotInitialized, DocumentNotFound) as beanie_exception:
+            logger.error(f"Error while applying notes batch: {beanie_exception}")
+            raise beanie_exception
+
+    @staticmethod
+    async def _set_flag(note_ids: list[PydanticObjectId], field_name: str, value: bool) -> int:
+        """
+        Set a boolean flag on the notes that do not have it yet with a single conditional update
+        """
+        change_seq = await change_seq_allocator.next_value()
+        result = await NoteDocument.get_motor_collection().update_many(
+            {"_id": {"$in": note_ids}, field_name: {"$ne": value}},
+            {"$set": {field_name: value, "updated_at": datetime.utcnow(), "change_seq": change_seq}},
+        )
+        if result.modified_count:
+            NoteDocument.mark_changed()
+        return result.modified_count
+
     @staticmethod
     async def delete(note_id: PydanticObjectId, is_permanent: bool) -> None:
         """
         Delete a note
         """
+        await NotesDatabase.delete_notes([note_id], is_permanent)
+
+    @staticmethod
+    async def delete_notes(note_ids: list[PydanticObjectId], is_permanent: bool) -> int:
+        """
+        Move notes to trash, or delete them permanently leaving a tombstone for the delta sync
+        """
         try:
-            note_object = await NoteDocument.find_one({"_id": note_id})
-            if is_permanent and note_object:
-                await note_object.delete()
-            else:
-                note_object.active = False
-                await note_object.save()
+            if is_permanent:
+                collection = NoteDocument.get_motor_collection()
+                existing_ids = [note["_id"] async for note in collection.find({"_id": {"$in": note_ids}}, {"_id": 1})]
+                if not existing_ids:
+                    return 0
+                result = await collection.delete_many({"_id": {"$in": existing_ids}})
+                await TombstoneDocument.record("note", existing_ids)
+                NoteDocument.mark_changed()
+                return result.deleted_count
+            return await NotesDatabase._set_flag(note_ids, "active", False)
         except (DocumentWasNotSaved, CollectionWasNotInitialized, DocumentNotFound) as beanie_exception:
-            logger.error(f"Error while deleting a note: {beanie_exception}")
+            logger.error(f"Error while deleting notes: {beanie_exception}")
             raise beanie_exception
 
     @staticmethod
-    async def get_all_notes(get_trash: bool, get_pinned: bool, get_archived: bool) -> list[NoteDocument]:
+    def _get_view(get_trash: bool, get_pinned: bool, get_archived: bool) -> tuple[dict, str, int]:
+        """
+        Resolve the filter and (sort field, direction) of a notes view
+        """
+        if get_trash and get_pinned:
+            raise InvalidQueryError("get_trash and get_pinned cannot be true at the same time")
+        if get_trash:
+            return {"active": False}, "updated_at", pymongo.DESCENDING
+        if get_pinned:
+            return {"pinned": True}, "updated_at", pymongo.DESCENDING
+        if get_archived:
+            return {"archived": True}, "updated_at", pymongo.DESCENDING
+        return {"active": True, "archived": False}, "order", pymongo.ASCENDING
+
+    @staticmethod
+    def _find_notes(
+        get_trash: bool,
+        get_pinned: bool,
+        get_archived: bool,
+        cursor: Optional[str],
+        view: NOTE_VIEW_LITERAL,
+        fields: Optional[str],
+        **motor_kwargs,
+    ) -> tuple[AsyncIOMotorCursor, str]:
+        """
+        Build the sorted and projected query of a notes view starting after the cursor, along with its sort field.
+        The query reads raw documents, the notes are only serialized so they are never built as models.
+        """
+        view_filter, sort_field, direction = NotesDatabase._get_view(get_trash, get_pinned, get_archived)
+        query = NoteDocument.get_motor_collection().find(
+            {**view_filter, **keyset_filter(sort_field, direction, cursor)},
+            note_projection(view, fields, sort_field),
+            sort=[
+                (sort_field, direction),
+                ("_id", direction),
+            ],
+            **motor_kwargs,
+        )
+        return query, sort_field
+
+    @staticmethod
+    async def get_version() -> Optional[tuple[datetime, int]]:
         """
-        Get all notes based on active, trash and pinned status
+        Version of the Notes collection, None while the newest write has not settled
+        """
+        return await NoteDocument.get_version()
+
+    @staticmethod
+    async def get_all_notes(
+        get_trash: bool,
+        get_pinned: bool,
+        get_archived: bool,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        view: NOTE_VIEW_LITERAL = "full",
+        fields: Optional[str] = None,
+    ) -> tuple[list[dict], Optional[str]]:
+        """
+        Get a page of notes based on active, trash and pinned status along with the cursor of the next page
         """
         try:
-            if get_trash and get_pinned:
-                raise ValueError("get_trash and get_pinned cannot be true at the same time")
-            if get_trash:
-                return (
-                    await NoteDocument.find({"active": False})
-                    .sort(
-                        [
-                            ("updated_at", pymongo.DESCENDING),
-                        ]
-                    )
-                    .to_list()
-                )
-            if get_pinned:
-                return (
-                    await NoteDocument.find({"pinned": True})
-                    .sort(
-                        [
-                            ("updated_at", pymongo.DESCENDING),
-                        ]
-                    )
-                    .to_list()
-                )
-            if get_archived:
-                return (
-                    await NoteDocument.find({"archived": True})
-                    .sort(
-                        [
-                            ("updated_at", pymongo.DESCENDING),
-                        ]
-                    )
-                    .to_list()
-                )
-            else:
-                return await NoteDocument.find(
-                    {"active": True},
-                    {"archived": False},
-                ).to_list()
+            query, sort_field = NotesDatabase._find_notes(get_trash, get_pinned, get_archived, cursor, view, fields)
+            notes = await query.limit(limit + 1).to_list(limit + 1)
+            next_cursor = None
+            if len(notes) > limit:
+                notes = notes[:limit]
+                last_note = notes[-1]
+                next_cursor = encode_cursor(last_note.get(sort_field), last_note["_id"])
+            return [compact(note) for note in notes], next_cursor
         except (DocumentWasNotSaved, CollectionWasNotInitialized, DocumentNotFound) as beanie_exception:
             logger.error(f"Error while getting notes: {beanie_exception}")
             raise beanie_exception
 
+    @staticmethod
+    def stream_notes(
+        get_trash: bool,
+        get_pinned: bool,
+        get_archived: bool,
+        cursor: Optional[str] = None,
+        view: NOTE_VIEW_LITERAL = "full",
+        fields: Optional[str] = None,
+    ) -> AsyncIterator[dict]:
+        """
+        Iterate every note of a view from the cursor onwards, fetching them from Mongo in batches
+        """
+        query, _ = NotesDatabase._find_notes(
+            get_trash,
+            get_pinned,
+            get_archived,
+            cursor,
+            view,
+            fields,
+            batch_size=STREAM_BATCH_SIZE,
+        )
+        return compact_documents(query)
+
     @staticmethod
     async def delete_label_from_note(request: DeleteLabelFromNoteModel) -> None:
         """
         Delete label from an existing note
         """
         try:
-            note_object = await NoteDocument.find_one({"_id": request.note_id})
-            if request.label in note_object.labels:
-                note_object.labels.remove(request.label)
+            label_id = (await label_cache.get_ids([request.label])).get(request.label)
+            if label_id is None:
                 label_object = await LabelDocument.find_one({"label": request.label})
-                note_object.label_ids.remove(label_object.id)
-                await note_object.save()
+                label_id = label_object.id if label_object else None
+            result = await NoteDocument.get_motor_collection().update_one(
+                {"_id": request.note_id, "labels": request.label},
+                {
+                    "$pull": {"labels": request.label, "label_ids": label_id},
+                    "$set": {
+                        "updated_at": datetime.utcnow(),
+                        "change_seq": await change_seq_allocator.next_value(),
+                    },
+                },
+            )
+            if result.modified_count:
+                NoteDocument.mark_changed()
         except (DocumentWasNotSaved, CollectionWasNotInitialized, DocumentNotFound) as beanie_exception:
             logger.error(f"Error while deleting label from note: {beanie_exception}")
             raise beanie_exception
@@ -135,16 +398,17 @@ class NotesDatabase:
         """
         Pin a note
         """
+        await NotesDatabase.pin_notes([note_id], unpin)
+
+    @staticmethod
+    async def pin_notes(note_ids: list[PydanticObjectId], unpin: bool) -> int:
+        """
+        Pin or unpin notes
+        """
         try:
-            note_object = await NoteDocument.find_one({"_id": note_id})
-            if note_object.pinned and unpin:
-                note_object.pinned = False
-                await note_object.save()
-            if not note_object.pinned and not unpin:
-                note_object.pinned = True
-                await note_object.save()
+            return await NotesDatabase._set_flag(note_ids, "pinned", not unpin)
         except (DocumentWasNotSaved, CollectionWasNotInitialized, DocumentNotFound) as beanie_exception:
-            logger.error(f"Error while pinning note: {beanie_exception}")
+            logger.error(f"Error while pinning notes: {beanie_exception}")
             raise beanie_exception
 
     @staticmethod
@@ -152,29 +416,157 @@ class NotesDatabase:
         """
         Archive a note
         """
-        try:
-            note_object = await NoteDocument.find_one({"_id": note_id})
-            if note_object.archived and un_archive:
-                note_object.archived = False
-                await note_object.save()
-            if not note_object.archived and not un_archive:
-                note_object.archived = True
-                await note_object.save()
+        await NotesDatabase.archive_notes([note_id], un_archive)
 
+    @staticmethod
+    async def archive_notes(note_ids: list[PydanticObjectId], un_archive: bool) -> int:
+        """
+        Archive or un archive notes
+        """
+        try:
+            return await NotesDatabase._set_flag(note_ids, "archived", not un_archive)
         except (DocumentWasNotSaved, CollectionWasNotInitialized, DocumentNotFound) as beanie_exception:
-            logger.error(f"Error while archiving note: {beanie_exception}")
+            logger.error(f"Error while archiving notes: {beanie_exception}")
             raise beanie_exception
 
     @staticmethod
-    async def search_notes(search_text: str) -> list[NoteDocument]:
+    def _search_pipeline(
+        search_text: str,
+        cursor: Optional[str],
+        pinned: Optional[bool],
+        archived: Optional[bool],
+        label_id: Optional[PydanticObjectId],
+        view: NOTE_VIEW_LITERAL,
+        fields: Optional[str],
+    ) -> list[dict]:
+        """
+        Text search of the active notes matching the filters, ranked by text score from the cursor onwards
+        """
+        search_filter: dict = {"$text": {"$search": search_text}, "active": True}
+        if pinned is not None:
+            search_filter["pinned"] = pinned
+        if archived is not None:
+            search_filter["archived"] = archived
+        if label_id is not None:
+            search_filter["label_ids"] = label_id
+        pipeline: list[dict] = [
+            {"$match": search_filter},
+            {"$addFields": {"score": {"$meta": "textScore"}}},
+        ]
+        if cursor:
+            pipeline.append({"$match": keyset_filter("score", pymongo.DESCENDING, cursor)})
+        pipeline.append({"$sort": {"score": pymongo.DESCENDING, "_id": pymongo.DESCENDING}})
+        pipeline.append({"$project": note_search_projection(view, fields)})
+        return pipeline
+
+    @staticmethod
+    async def search_notes(
+        search_text: str,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        pinned: Optional[bool] = None,
+        archived: Optional[bool] = None,
+        label_id: Optional[PydanticObjectId] = None,
+        view: NOTE_VIEW_LITERAL = "full",
+        fields: Optional[str] = None,
+    ) -> tuple[list[dict], Optional[str]]:
         """
-        Search notes
+        Get a page of the notes matching the search text, most relevant first, along with the cursor of the next page
         """
         try:
-            notes = await NoteDocument.find({"$text": {"$search": search_text}, "active": True}).to_list()
+            pipeline = NotesDatabase._search_pipeline(search_text, cursor, pinned, archived, label_id, view, fields)
+            # The limit goes before the projection so the server only cuts the previews of the returned notes
+            pipeline.insert(-1, {"$limit": limit + 1})
+            notes = await NoteDocument.get_motor_collection().aggregate(pipeline).to_list(limit + 1)
+            next_cursor = None
+            if len(notes) > limit:
+                notes = notes[:limit]
+                next_cursor = encode_cursor(notes[-1]["score"], notes[-1]["_id"])
+            return [compact(note) for note in notes], next_cursor
 
-            return notes
+        except (DocumentWasNotSaved, CollectionWasNotInitialized, DocumentNotFound) as beanie_exception:
+            logger.error(f"Error while searching notes: {beanie_exception}")
+            raise beanie_exception
+
+    @staticmethod
+    async def suggest_notes(
+        search_text: str,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        view: NOTE_VIEW_LITERAL = "full",
+        fields: Optional[str] = None,
+    ) -> tuple[list[dict], Optional[str]]:
+        """
+        Rank the notes matching every word of the search text as a prefix from the in-process search index and return
+        a page of them with the cursor of the next page. The first search starts building the index, the text index
+        answers until it is built.
+        """
+        try:
+            after = decode_cursor(cursor) if cursor else None
+            # Pages served by the text index carry a tagged score, the two indexes score on different scales
+            if after is not None and isinstance(after[0], list):
+                if len(after[0]) != 2 or after[0][0] != TEXT_INDEX_CURSOR:
+                    raise InvalidQueryError(f"Invalid cursor: {cursor}")
+                return await NotesDatabase._suggest_with_text_index(search_text, limit, after, view, fields)
+            if not note_search_index.ready:
+                note_search_index.ensure_rebuild(NoteDocument)
+                if after is not None:
+                    raise InvalidQueryError("The search index is being rebuilt, start the search again")
+                return await NotesDatabase._suggest_with_text_index(search_text, limit, None, view, fields)
+            hits = await note_search_index.search(search_text, limit + 1, after)
+            page = hits[:limit]
+            notes_by_id = {
+                note["_id"]: compact(note)
+                async for note in NoteDocument.get_motor_collection().find(
+                    {"_id": {"$in": [note_id for _, note_id in page]}, "active": True},
+                    note_projection(view, fields),
+                )
+            }
+            for _, note_id in page:
+                # Deleted by another process since the last sync of the index
+                if note_id not in notes_by_id:
+                    note_search_index.remove(note_id)
+            next_cursor = encode_cursor(*page[-1]) if len(hits) > limit else None
+            return [notes_by_id[note_id] for _, note_id in page if note_id in notes_by_id], next_cursor
 
         except (DocumentWasNotSaved, CollectionWasNotInitialized, DocumentNotFound) as beanie_exception:
-            logger.error(f"Error while archiving note: {beanie_exception}")
+            logger.error(f"Error while suggesting notes: {beanie_exception}")
             raise beanie_exception
+
+    @staticmethod
+    async def _suggest_with_text_index(
+        search_text: str,
+        limit: int,
+        after: Optional[tuple],
+        view: NOTE_VIEW_LITERAL,
+        fields: Optional[str],
+    ) -> tuple[list[dict], Optional[str]]:
+        """
+        Page of suggestions from the text index while the search index is not ready, with a cursor tagged as such
+        """
+        cursor = encode_cursor(after[0][1], after[1]) if after is not None else None
+        notes, next_cursor = await NotesDatabase.search_notes(search_text, limit, cursor, view=view, fields=fields)
+        if next_cursor is not None:
+            score, note_id = decode_cursor(next_cursor)
+            next_cursor = encode_cursor([TEXT_INDEX_CURSOR, score], note_id)
+        return notes, next_cursor
+
+    @staticmethod
+    def stream_search_notes(
+        search_text: str,
+        cursor: Optional[str] = None,
+        pinned: Optional[bool] = None,
+        archived: Optional[bool] = None,
+        label_id: Optional[PydanticObjectId] = None,
+        view: NOTE_VIEW_LITERAL = "full",
+        fields: Optional[str] = None,
+    ) -> AsyncIterator[dict]:
+        """
+        Iterate the notes matching the search text, most relevant first, fetching them from Mongo in batches
+        """
+        return compact_documents(
+            NoteDocument.get_motor_collection().aggregate(
+                NotesDatabase._search_pipeline(search_text, cursor, pinned, archived, label_id, view, fields),
+                batchSize=STREAM_BATCH_SIZE,
+            )
+        )
@@ -0,0 +1,105 @@
+from datetime import datetime
+from functools import lru_cache
+from typing import AsyncIterator, Optional
+
+from beanie import PydanticObjectId
+from bson import ObjectId
+from pydantic import BaseModel, Field
+
+from app.constants import NOTE_PREVIEW_LENGTH, NOTE_VIEW_LITERAL
+from app.utils import InvalidQueryError
+
+NOTE_SUMMARY_FIELDS = ("title", "notes", "labels", "pinned", "background_color_index", "order")
+
+
+class NoteProjection(BaseModel):
+    """
+    Fields a listed note can carry. The read queries return notes as plain dicts of this shape, not as models.
+    """
+
+    id: Optional[PydanticObjectId] = Field(default=None, alias="_id")
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    title: Optional[str] = None
+    notes: Optional[str] = None
+    label_ids: Optional[list[PydanticObjectId]] = None
+    labels: Optional[list[str]] = None
+    images: Optional[list[str]] = None
+    background_color_index: Optional[str] = None
+    background_image_index: Optional[str] = None
+    active: Optional[bool] = None
+    pinned: Optional[bool] = None
+    archived: Optional[bool] = None
+    order: Optional[int] = None
+    change_seq: Optional[int] = None
+    score: Optional[float] = None
+
+    class Config:
+        json_encoders = {
+            ObjectId: lambda v: str(v),
+        }
+        allow_population_by_field_name = True
+
+
+NOTE_PROJECTION_FIELDS = frozenset(NoteProjection.__fields__) - {"id", "score"}
+NOTE_FULL_FIELDS = tuple(field_name for field_name in NoteProjection.__fields__ if field_name in NOTE_PROJECTION_FIELDS)
+
+
+@lru_cache(maxsize=128)
+def get_note_projection(field_names: tuple[str, ...], preview: bool) -> dict:
+    """
+    Build the Mongo projection of the given fields, with the note body cut server side when previewing.
+    The projection is cached and shared between queries, it must not be modified.
+    """
+    projection: dict = {field_name: 1 for field_name in field_names}
+    if preview and "notes" in projection:
+        projection["notes"] = {
+            "$cond": [
+                {"$eq": [{"$type": "$notes"}, "string"]},
+                {"$substrCP": ["$notes", 0, NOTE_PREVIEW_LENGTH]},
+                "$$REMOVE",
+            ]
+        }
+    return projection
+
+
+def get_field_names(view: NOTE_VIEW_LITERAL, fields: Optional[str]) -> Optional[tuple[str, ...]]:
+    """
+    Resolve the `view` and comma separated `fields` parameters to the projected field names, None for full documents
+    """
+    if fields:
+        field_names = tuple(field_name.strip() for field_name in fields.split(",") if field_name.strip())
+        unknown_fields = set(field_names) - NOTE_PROJECTION_FIELDS
+        if unknown_fields:
+            raise InvalidQueryError(f"Unknown note fields: {', '.join(sorted(unknown_fields))}")
+        return field_names
+    if view == "summary":
+        return NOTE_SUMMARY_FIELDS
+    return None
+
+
+def note_projection(view: NOTE_VIEW_LITERAL, fields: Optional[str], *required_fields: str) -> dict:
+    """
+    Resolve the `view` and comma separated `fields` parameters to a projection, every note field for full documents
+    """
+    field_names = get_field_names(view, fields) or NOTE_FULL_FIELDS
+    return get_note_projection(tuple(dict.fromkeys((*field_names, *required_fields))), view == "summary")
+
+
+def note_search_projection(view: NOTE_VIEW_LITERAL, fields: Optional[str]) -> dict:
+    """
+    Projection of text search results, always carrying the text score
+    """
+    return note_projection(view, fields, "score")
+
+
+def compact(document: dict) -> dict:
+    """
+    Drop the fields stored as null, as the responses leave out None values
+    """
+    return {field_name: value for field_name, value in document.items() if value is not None}
+
+
+async def compact_documents(documents: AsyncIterator[dict]) -> AsyncIterator[dict]:
+    async for document in documents:
+        yield compact(document)
@@ -1,9 +1,15 @@
 from app.model.request.image_request_model import UpdateImageRequestModel
 from app.model.request.label_request_model import UpdateLabelRequestModel
 from app.model.request.notes_request_model import (
+    BatchNoteRequestModel,
+    BulkNoteRequestModel,
     CreateNoteModel,
+    CreateNoteOperationModel,
     DeleteLabelFromNoteModel,
+    DeleteNoteOperationModel,
+    NoteOperationModel,
     UpdateNoteModel,
+    UpdateNoteOperationModel,
 )
 from app.model.response.common_response_model import CommonResponseModel
 
@@ -12,6 +18,12 @@ __all__ = [
     "CreateNoteModel",
     "UpdateNoteModel",
     "DeleteLabelFromNoteModel",
+    "BulkNoteRequestModel",
+    "BatchNoteRequestModel",
+    "CreateNoteOperationModel",
+    "UpdateNoteOperationModel",
+    "DeleteNoteOperationModel",
+    "NoteOperationModel",
     "UpdateLabelRequestModel",
     "UpdateImageRequestModel",
 ]
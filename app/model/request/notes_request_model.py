@@ -1,7 +1,7 @@
-from typing import Optional
+from typing import Annotated, Literal, Optional, Union
 
 from beanie import PydanticObjectId
-from pydantic import AnyUrl, BaseModel, root_validator
+from pydantic import AnyUrl, BaseModel, Field, root_validator
 
 
 class CreateNoteModel(BaseModel):
@@ -27,3 +27,33 @@ class UpdateNoteModel(CreateNoteModel):
 class DeleteLabelFromNoteModel(BaseModel):
     note_id: PydanticObjectId
     label: str
+
+
+class BulkNoteRequestModel(BaseModel):
+    note_ids: list[PydanticObjectId] = Field(min_items=1)
+
+
+class CreateNoteOperationModel(BaseModel):
+    op: Literal["create"]
+    note: CreateNoteModel
+
+
+class UpdateNoteOperationModel(BaseModel):
+    op: Literal["update"]
+    note: UpdateNoteModel
+
+
+class DeleteNoteOperationModel(BaseModel):
+    op: Literal["delete"]
+    note_id: PydanticObjectId
+    is_permanent: bool = False
+
+
+NoteOperationModel = Annotated[
+    Union[CreateNoteOperationModel, UpdateNoteOperationModel, DeleteNoteOperationModel],
+    Field(discriminator="op"),
+]
+
+
+class BatchNoteRequestModel(BaseModel):
+    operations: list[NoteOperationModel] = Field(min_items=1)
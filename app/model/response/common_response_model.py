@@ -10,3 +10,4 @@ class CommonResponseModel(BaseModel):
     message: str
     data: Optional[Any] = None
     error: Optional[Any] = None
+    next_cursor: Optional[str] = None
@@ -1,25 +1,101 @@
+import asyncio
+from typing import Optional
+
 from beanie import init_beanie
 from motor.motor_asyncio import AsyncIOMotorClient
 
 from app.mongo.base_document import BaseDocument
-from app.mongo.notes_document import LabelDocument, NoteDocument
+from app.mongo.change_seq_allocator import change_seq_allocator
+from app.mongo.counter_document import (
+    CHANGE_SEQ_COUNTER,
+    NOTES_ORDER_COUNTER,
+    CounterDocument,
+)
+from app.mongo.image_document import ImageDocument
+from app.mongo.label_cache import label_cache
+from app.mongo.migrations import build_indexes
+from app.mongo.note_search_index import note_search_index
+from app.mongo.notes_document import (
+    LABEL_INDEXES,
+    NOTE_INDEXES,
+    LabelDocument,
+    NoteDocument,
+)
+from app.mongo.tombstone_document import TombstoneDocument
+from app.utils import MongoCommandListener
+
+
+def create_client(settings) -> AsyncIOMotorClient:
+    """
+    Motor client with the pool, timeouts, wire compression, read preference and write concern of the settings
+    """
+    options = {
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "maxIdleTimeMS": settings.MONGO_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": settings.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "readPreference": settings.MONGO_READ_PREFERENCE,
+        "event_listeners": [MongoCommandListener()],
+    }
+    if settings.MONGO_COMPRESSORS:
+        options["compressors"] = settings.MONGO_COMPRESSORS
+    if settings.MONGO_WRITE_CONCERN is not None:
+        options["w"] = settings.MONGO_WRITE_CONCERN
+    return AsyncIOMotorClient(settings.MONGO_HOST, **options)
+
+
+async def warm_pool(client: AsyncIOMotorClient, connections: int) -> None:
+    """
+    Open connections up front with concurrent pings, the driver then keeps min pool size connections open
+    """
+    await asyncio.gather(*(client.admin.command("ping") for _ in range(max(connections, 1))))
 
 
-async def init_mongo(settings):
-    client = AsyncIOMotorClient(settings.MONGO_HOST)
+async def init_mongo(settings, client: Optional[AsyncIOMotorClient] = None) -> AsyncIOMotorClient:
+    """
+    Connect to Mongo and initialize the documents, returning the client for the caller to close on shutdown.
+    A given client, such as an in-process stand-in for the benchmarks, is used as is instead of one built from settings.
+    """
+    if client is None:
+        client = create_client(settings)
+        await warm_pool(client, settings.MONGO_MIN_POOL_SIZE)
+    change_seq_allocator.reset()
     await init_beanie(
-        database=client.GoogleKeepClone,
+        database=client[settings.MONGO_DATABASE],
         document_models=[
             BaseDocument,
             NoteDocument,
             LabelDocument,
+            CounterDocument,
+            ImageDocument,
+            TombstoneDocument,
         ],
     )
+    await NoteDocument.seed_order_counter()
+    await NoteDocument.backfill_change_seq()
+    await LabelDocument.backfill_change_seq()
+    await label_cache.warm(LabelDocument)
+    # Built on the first search, a worker re-initialized on another database must not serve the previous one
+    note_search_index.reset()
+    return client
 
 
 __all__ = [
     "init_mongo",
+    "create_client",
     "BaseDocument",
+    "CounterDocument",
+    "ImageDocument",
+    "NOTES_ORDER_COUNTER",
+    "CHANGE_SEQ_COUNTER",
     "NoteDocument",
     "LabelDocument",
+    "TombstoneDocument",
+    "NOTE_INDEXES",
+    "LABEL_INDEXES",
+    "build_indexes",
+    "label_cache",
+    "change_seq_allocator",
+    "note_search_index",
 ]
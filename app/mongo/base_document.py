@@ -1,10 +1,25 @@
 from datetime import datetime
 from typing import Optional
 
-from beanie import Document
+from beanie import Document, Insert, Replace, Save, SaveChanges, before_event
 from pydantic import Field
 
+from app.mongo.change_seq_allocator import change_seq_allocator
+
 
 class BaseDocument(Document):
-    created_at: Optional[datetime] = Field(default=datetime.now())
-    updated_at: Optional[datetime] = Field(default=datetime.now())
+    created_at: Optional[datetime] = Field(default_factory=datetime.utcnow)
+    updated_at: Optional[datetime] = Field(default_factory=datetime.utcnow)
+    # Position of the last write in the change sequence read by the delta sync, raw writes stamp it themselves
+    change_seq: int = 0
+
+    @before_event(Insert, Replace, Save, SaveChanges)
+    async def set_change_seq(self):
+        self.change_seq = await change_seq_allocator.next_value()
+
+    @classmethod
+    async def backfill_change_seq(cls) -> None:
+        """
+        Give the documents stored before the change sequence existed the sequence 0, so a first sync returns them
+        """
+        await cls.get_motor_collection().update_many({"change_seq": None}, {"$set": {"change_seq": 0}})
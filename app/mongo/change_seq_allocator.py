@@ -0,0 +1,52 @@
+import asyncio
+import time
+from typing import Optional
+
+from app.constants import CHANGE_SEQ_BLOCK_LEASE, CHANGE_SEQ_BLOCK_SIZE
+from app.mongo.counter_document import CHANGE_SEQ_COUNTER, CounterDocument
+
+
+class ChangeSeqAllocator:
+    """
+    Hands out values of the change sequence from blocks reserved with one counter round trip.
+
+    Another process may reserve the next block and write with its values first, so a block is only used for the lease
+    after it was reserved. The delta sync token never moves past a change younger than the settle time, which covers
+    the lease plus the time a write takes to become visible, so a value handed out late is still picked up.
+    """
+
+    def __init__(self, block_size: int, lease: float) -> None:
+        self.block_size = block_size
+        self.lease = lease
+        self._next_value = 0
+        self._last_value = -1
+        self._expires_at = 0.0
+        self._reservation: Optional[asyncio.Future] = None
+
+    async def next_value(self) -> int:
+        while self._next_value > self._last_value or time.monotonic() >= self._expires_at:
+            # Writes arriving while a block is being reserved wait for it instead of reserving their own
+            if self._reservation is None:
+                self._reservation = asyncio.ensure_future(self._reserve())
+            await asyncio.shield(self._reservation)
+        value = self._next_value
+        self._next_value += 1
+        return value
+
+    def reset(self) -> None:
+        """
+        Forget the current block, the next value comes from a block reserved on the counter of the current database
+        """
+        self._next_value, self._last_value = 0, -1
+        self._expires_at = 0.0
+
+    async def _reserve(self) -> None:
+        try:
+            last_value = await CounterDocument.next_value(CHANGE_SEQ_COUNTER, step=self.block_size)
+            self._next_value, self._last_value = last_value - self.block_size + 1, last_value
+            self._expires_at = time.monotonic() + self.lease
+        finally:
+            self._reservation = None
+
+
+change_seq_allocator = ChangeSeqAllocator(block_size=CHANGE_SEQ_BLOCK_SIZE, lease=CHANGE_SEQ_BLOCK_LEASE)
@@ -0,0 +1,48 @@
+from beanie import Document
+from pymongo import ReturnDocument
+
+NOTES_ORDER_COUNTER = "notes_order"
+LABELS_VERSION_COUNTER = "labels_version"
+CHANGE_SEQ_COUNTER = "change_seq"
+
+
+class CounterDocument(Document):
+    id: str
+    value: int = 0
+
+    class Settings:
+        name = "Counters"
+
+    @classmethod
+    async def next_value(cls, name: str, step: int = 1) -> int:
+        """
+        Atomically reserve the next `step` values of a sequence and return the last one reserved
+        """
+        counter = await cls.get_motor_collection().find_one_and_update(
+            {"_id": name},
+            {"$inc": {"value": step}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return counter["value"]
+
+    @classmethod
+    async def get_values(cls, names: list[str]) -> dict[str, int]:
+        """
+        Current value of each sequence with a single lookup, 0 for sequences that were never bumped
+        """
+        values = dict.fromkeys(names, 0)
+        async for counter in cls.get_motor_collection().find({"_id": {"$in": names}}):
+            values[counter["_id"]] = counter["value"]
+        return values
+
+    @classmethod
+    async def seed(cls, name: str, value: int) -> None:
+        """
+        Make sure a sequence never hands out values at or below `value`
+        """
+        await cls.get_motor_collection().update_one(
+            {"_id": name},
+            {"$max": {"value": value}},
+            upsert=True,
+        )
@@ -0,0 +1,23 @@
+from datetime import datetime
+from typing import Optional
+
+from beanie import Document
+from pydantic import Field
+
+
+class ImageDocument(Document):
+    """
+    Metadata of a stored image, keyed by the SHA-256 of its content
+    """
+
+    id: str
+    url: str
+    key: str
+    size: int
+    content_type: Optional[str] = None
+    filename: Optional[str] = None
+    variants: dict[str, str] = Field(default_factory=dict)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "Images"
@@ -0,0 +1,112 @@
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from beanie import PydanticObjectId
+
+from app.constants import LABEL_CACHE_CHECK_INTERVAL, LABEL_CACHE_MAX_SIZE
+from app.mongo.counter_document import LABELS_VERSION_COUNTER, CounterDocument
+
+
+class LabelCache:
+    """
+    Bounded in-process registry of label documents by name and by id.
+
+    Every label write bumps the labels version counter. Each worker compares its own version with the counter at most
+    once per check interval and reloads when another process changed the labels, so lookups stay in memory and a
+    label change made elsewhere is picked up within the interval.
+    """
+
+    def __init__(self, max_size: int, check_interval: float) -> None:
+        self.max_size = max_size
+        self.check_interval = check_interval
+        self._document_model: Any = None
+        self._by_name: OrderedDict[str, Any] = OrderedDict()
+        self._by_id: dict[PydanticObjectId, Any] = {}
+        self._complete = False
+        self._version = 0
+        self._checked_at = 0.0
+
+    async def warm(self, document_model: Any) -> None:
+        """
+        Load the labels of the given document model, reading the version first so a concurrent change forces a reload
+        """
+        self._document_model = document_model
+        version = await self._read_version()
+        labels = await document_model.find_all().limit(self.max_size + 1).to_list()
+        self._by_name.clear()
+        self._by_id.clear()
+        for label_document in labels[: self.max_size]:
+            self.put(label_document)
+        self._complete = len(labels) <= self.max_size
+        self._version = version
+        self._checked_at = time.monotonic()
+
+    async def refresh(self) -> None:
+        """
+        Reload the labels if another process changed them, checking the version at most once per interval
+        """
+        if self._document_model is None or time.monotonic() - self._checked_at < self.check_interval:
+            return
+        self._checked_at = time.monotonic()
+        if await self._read_version() != self._version:
+            await self.warm(self._document_model)
+
+    async def get_ids(self, labels: list[str]) -> dict[str, PydanticObjectId]:
+        """
+        Map the cached label names to their ids, names that are not cached are left out
+        """
+        await self.refresh()
+        label_ids = {}
+        for label in labels:
+            label_document = self._by_name.get(label)
+            if label_document is not None:
+                self._by_name.move_to_end(label)
+                label_ids[label] = label_document.id
+        return label_ids
+
+    async def get_all(self) -> Optional[list]:
+        """
+        All label documents, or None when the registry holds only part of them
+        """
+        await self.refresh()
+        if not self._complete:
+            return None
+        return list(self._by_id.values())
+
+    def put(self, label_document: Any) -> None:
+        previous_document = self._by_id.get(label_document.id)
+        if previous_document is not None and previous_document.label != label_document.label:
+            self._by_name.pop(previous_document.label, None)
+        replaced_document = self._by_name.get(label_document.label)
+        if replaced_document is not None and replaced_document.id != label_document.id:
+            self._by_id.pop(replaced_document.id, None)
+        self._by_name[label_document.label] = label_document
+        self._by_name.move_to_end(label_document.label)
+        self._by_id[label_document.id] = label_document
+        while len(self._by_name) > self.max_size:
+            _, evicted_document = self._by_name.popitem(last=False)
+            self._by_id.pop(evicted_document.id, None)
+            self._complete = False
+
+    def remove(self, label_document: Any) -> None:
+        cached_document = self._by_id.pop(label_document.id, None)
+        if cached_document is not None:
+            self._by_name.pop(cached_document.label, None)
+
+    async def bump_version(self) -> None:
+        """
+        Tell the other processes that the labels changed after a local write
+        """
+        version = await CounterDocument.next_value(LABELS_VERSION_COUNTER)
+        # Only move forward without reloading when no other process changed the labels in between
+        if version == self._version + 1:
+            self._version = version
+
+    @staticmethod
+    async def _read_version() -> int:
+        counter = await CounterDocument.get_motor_collection().find_one({"_id": LABELS_VERSION_COUNTER})
+        return counter["value"] if counter else 0
+
+
+label_cache = LabelCache(max_size=LABEL_CACHE_MAX_SIZE, check_interval=LABEL_CACHE_CHECK_INTERVAL)
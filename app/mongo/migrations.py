@@ -0,0 +1,49 @@
+import asyncio
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
+
+from app.mongo.notes_document import (
+    LABEL_INDEXES,
+    NOTE_INDEXES,
+    LabelDocument,
+    NoteDocument,
+)
+from app.utils import logger
+
+MIGRATION_INDEXES: dict[str, list[IndexModel]] = {
+    NoteDocument.Settings.name: NOTE_INDEXES,
+    LabelDocument.Settings.name: LABEL_INDEXES,
+}
+
+
+async def build_indexes(database: AsyncIOMotorDatabase) -> list[str]:
+    """
+    Build the declared indexes that are missing on an existing deployment, one at a time in the background
+    """
+    created_indexes = []
+    for collection_name, indexes in MIGRATION_INDEXES.items():
+        collection = database[collection_name]
+        existing_indexes = await collection.index_information()
+        for index in indexes:
+            index_name = index.document["name"]
+            if index_name in existing_indexes:
+                continue
+            logger.info(f"Building index {index_name} on {collection_name}")
+            await collection.create_indexes([index])
+            created_indexes.append(index_name)
+    return created_indexes
+
+
+async def main() -> None:
+    from app.config import settings
+    from app.mongo import create_client
+
+    client = create_client(settings)
+    created_indexes = await build_indexes(client[settings.MONGO_DATABASE])
+    logger.info(f"Created indexes: {created_indexes}")
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
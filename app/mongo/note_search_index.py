@@ -0,0 +1,285 @@
+import asyncio
+import heapq
+import math
+import re
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from bson import ObjectId
+
+from app.constants import (
+    SEARCH_FIELD_WEIGHTS,
+    SEARCH_INDEX_CHECK_INTERVAL,
+    SEARCH_INDEX_SYNC_OVERLAP,
+    SEARCH_MAX_PREFIX_EXPANSIONS,
+    SEARCH_MIN_PREFIX_LENGTH,
+    STREAM_BATCH_SIZE,
+)
+from app.utils import logger
+
+TOKEN_PATTERN = re.compile(r"\w+")
+# Score of a term matched by prefix relative to the same term matched whole
+PREFIX_MATCH_FACTOR = 0.5
+SEARCH_PROJECTION = {"title": 1, "notes": 1, "labels": 1, "active": 1, "updated_at": 1}
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    return TOKEN_PATTERN.findall(text.casefold()) if text else []
+
+
+class NoteSearchIndex:
+    """
+    In-process inverted index over the title, notes and labels of active notes, answering ranked prefix queries.
+
+    Terms are kept sorted in buckets by their first two characters, so a prefix resolves to its terms with a bisect.
+    Notes written through Beanie are indexed by the document events. For writes made with raw bulk updates or by
+    other processes the index compares the notes version at most once per check interval, and on a change or while the
+    newest write has not settled it re-reads the notes updated since its last sync.
+    """
+
+    def __init__(self, check_interval: float, sync_overlap: float, min_prefix_length: int, max_expansions: int) -> None:
+        self.check_interval = check_interval
+        self.sync_overlap = timedelta(seconds=sync_overlap)
+        self.min_prefix_length = min_prefix_length
+        self.max_expansions = max_expansions
+        self.ready = False
+        self._document_model: Any = None
+        # Notes are keyed by the bytes of their id, hashed natively and ordered like the ObjectIds
+        self._postings: dict[str, dict[bytes, float]] = {}
+        self._note_terms: dict[bytes, dict[str, float]] = {}
+        self._buckets: dict[str, list[str]] = {}
+        self._bucket_keys: dict[str, set[str]] = {}
+        self._version: Any = None
+        self._synced_at = datetime.min
+        self._checked_at = 0.0
+        self._rebuild_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._note_terms)
+
+    def start_rebuild(self, document_model: Any) -> None:
+        """
+        Build the index in the background, searches fall back to the text index until it is ready
+        """
+        self._rebuild_task = asyncio.create_task(self.rebuild(document_model))
+        self._rebuild_task.add_done_callback(self._log_rebuild)
+
+    def ensure_rebuild(self, document_model: Any) -> None:
+        """
+        Start building the index on the first search, so workers that never serve one skip the collection scan.
+        A rebuild that failed is started again.
+        """
+        if self._rebuild_task is None or (self._rebuild_task.done() and not self.ready):
+            self.start_rebuild(document_model)
+
+    def stop(self) -> None:
+        """
+        Cancel a rebuild still running, before the client it reads from is closed
+        """
+        if self._rebuild_task is not None:
+            self._rebuild_task.cancel()
+
+    def reset(self) -> None:
+        """
+        Drop the index and stop a rebuild still running, the next search builds it again from the current database
+        """
+        self.stop()
+        self._rebuild_task = None
+        self.ready = False
+        self._document_model = None
+        self._postings.clear()
+        self._note_terms.clear()
+        self._buckets.clear()
+        self._bucket_keys.clear()
+        self._version = None
+
+    @staticmethod
+    def _log_rebuild(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Search index rebuild failed: {task.exception()}")
+
+    async def rebuild(self, document_model: Any) -> None:
+        """
+        Index every active note with a single cursor scan, reading the version first so later writes are synced
+        """
+        self._document_model = document_model
+        self.ready = False
+        version = await self._read_version()
+        started_at = datetime.utcnow()
+        self._postings.clear()
+        self._note_terms.clear()
+        self._buckets.clear()
+        self._bucket_keys.clear()
+        async for note in document_model.get_motor_collection().find(
+            {"active": True}, SEARCH_PROJECTION, batch_size=STREAM_BATCH_SIZE
+        ):
+            self.put(note["_id"], note.get("title"), note.get("notes"), note.get("labels"))
+        self._version = version
+        self._synced_at = started_at
+        self._checked_at = time.monotonic()
+        self.ready = True
+        logger.info(f"Search index built over {len(self)} notes")
+
+    async def refresh(self) -> None:
+        """
+        Re-index the notes updated since the last sync if the notes changed, checking at most once per interval
+        """
+        if not self.ready or time.monotonic() - self._checked_at < self.check_interval:
+            return
+        self._checked_at = time.monotonic()
+        version = await self._read_version()
+        if version is not None and version == self._version:
+            return
+        synced_at = self._synced_at
+        # The overlap absorbs clock skew between the processes stamping updated_at
+        async for note in self._document_model.get_motor_collection().find(
+            {"active": {"$in": [True, False]}, "updated_at": {"$gte": self._synced_at - self.sync_overlap}},
+            SEARCH_PROJECTION,
+            batch_size=STREAM_BATCH_SIZE,
+        ):
+            if note.get("active", True):
+                self.put(note["_id"], note.get("title"), note.get("notes"), note.get("labels"))
+            else:
+                self.remove(note["_id"])
+            synced_at = max(synced_at, note.get("updated_at") or synced_at)
+        self._version = version
+        self._synced_at = synced_at
+
+    def expire(self) -> None:
+        """
+        Check the notes version on the next query, so local writes are searchable right away
+        """
+        self._checked_at = 0.0
+
+    def put(
+        self,
+        note_id: ObjectId,
+        title: Optional[str],
+        notes: Optional[str],
+        labels: Optional[list[str]],
+    ) -> None:
+        weights: dict[str, float] = {}
+        for field_name, text in (("title", title), ("notes", notes), ("labels", " ".join(labels or []))):
+            for term in tokenize(text):
+                weights[term] = weights.get(term, 0.0) + SEARCH_FIELD_WEIGHTS[field_name]
+        weights = {term: 1.0 + math.log(weight) for term, weight in weights.items()}
+
+        note_key = note_id.binary
+        previous_weights = self._note_terms.get(note_key, {})
+        for term in previous_weights.keys() - weights.keys():
+            self._remove_posting(term, note_key)
+        for term, weight in weights.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._add_term(term)
+            postings[note_key] = weight
+        self._note_terms[note_key] = weights
+
+    def remove(self, note_id: ObjectId) -> None:
+        note_key = note_id.binary
+        for term in self._note_terms.pop(note_key, {}):
+            self._remove_posting(term, note_key)
+
+    async def search(self, query: str, limit: int, after: Optional[tuple[float, ObjectId]] = None) -> list[tuple]:
+        """
+        Best (score, note_id) pairs for notes matching every word of the query as a prefix, ranked after `after`
+        """
+        await self.refresh()
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        note_count = len(self._note_terms)
+        # Start from the most selective word so the later ones only probe the remaining candidates
+        expansions = sorted(
+            ((token, self._expand(token)) for token in tokens),
+            key=lambda expansion: sum(len(self._postings[term]) for term in expansion[1]),
+        )
+        scores: Optional[dict[bytes, float]] = None
+        for token, terms in expansions:
+            token_scores: dict[bytes, float] = {}
+            for term in terms:
+                postings = self._postings[term]
+                term_weight = math.log(1 + note_count / len(postings)) * (1.0 if term == token else PREFIX_MATCH_FACTOR)
+                if scores is None and not token_scores:
+                    token_scores = {note_key: weight * term_weight for note_key, weight in postings.items()}
+                    continue
+                if scores is None:
+                    matches = postings.items()
+                elif len(postings) < len(scores):
+                    matches = ((note_key, weight) for note_key, weight in postings.items() if note_key in scores)
+                else:
+                    matches = ((note_key, postings[note_key]) for note_key in scores if note_key in postings)
+                for note_key, weight in matches:
+                    score = weight * term_weight
+                    if score > token_scores.get(note_key, 0.0):
+                        token_scores[note_key] = score
+            if scores is not None:
+                token_scores = {note_key: scores[note_key] + score for note_key, score in token_scores.items()}
+            scores = token_scores
+            if not scores:
+                return []
+
+        ranked = ((score, note_key) for note_key, score in scores.items())
+        if after is not None:
+            after_entry = (after[0], after[1].binary)
+            ranked = (entry for entry in ranked if entry < after_entry)
+        return [(score, ObjectId(note_key)) for score, note_key in heapq.nlargest(limit, ranked)]
+
+    def _expand(self, prefix: str) -> list[str]:
+        """
+        Indexed terms starting with the prefix, the most frequent ones when there are more than max_expansions.
+        Prefixes shorter than min_prefix_length only match the whole term, they would expand to most of the index.
+        """
+        if len(prefix) < self.min_prefix_length:
+            return [prefix] if prefix in self._postings else []
+        if len(prefix) >= 2:
+            buckets = [self._buckets.get(prefix[:2], [])]
+        else:
+            buckets = [self._buckets[bucket_key] for bucket_key in self._bucket_keys.get(prefix, ())]
+        terms = []
+        for bucket in buckets:
+            position = bisect_left(bucket, prefix)
+            while position < len(bucket) and bucket[position].startswith(prefix):
+                terms.append(bucket[position])
+                position += 1
+        if len(terms) > self.max_expansions:
+            terms = heapq.nlargest(self.max_expansions, terms, key=lambda term: len(self._postings[term]))
+            if prefix in self._postings and prefix not in terms:
+                terms.append(prefix)
+        return terms
+
+    def _add_term(self, term: str) -> None:
+        bucket = self._buckets.get(term[:2])
+        if bucket is None:
+            bucket = self._buckets[term[:2]] = []
+            self._bucket_keys.setdefault(term[0], set()).add(term[:2])
+        insort(bucket, term)
+
+    def _remove_posting(self, term: str, note_key: bytes) -> None:
+        postings = self._postings[term]
+        postings.pop(note_key, None)
+        if postings:
+            return
+        del self._postings[term]
+        bucket = self._buckets[term[:2]]
+        del bucket[bisect_left(bucket, term)]
+        if not bucket:
+            del self._buckets[term[:2]]
+            bucket_keys = self._bucket_keys[term[0]]
+            bucket_keys.discard(term[:2])
+            if not bucket_keys:
+                del self._bucket_keys[term[0]]
+
+    async def _read_version(self) -> Any:
+        return await self._document_model.get_version()
+
+
+note_search_index = NoteSearchIndex(
+    check_interval=SEARCH_INDEX_CHECK_INTERVAL,
+    sync_overlap=SEARCH_INDEX_SYNC_OVERLAP,
+    min_prefix_length=SEARCH_MIN_PREFIX_LENGTH,
+    max_expansions=SEARCH_MAX_PREFIX_EXPANSIONS,
+)
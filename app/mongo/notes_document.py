@@ -1,45 +1,263 @@
-from datetime import datetime
+import asyncio
+import time
+from datetime import datetime, timedelta
 from typing import Optional
 
 import pymongo
-from beanie import Delete, Indexed, Insert, PydanticObjectId, Update, before_event
-from box import Box
+from beanie import (
+    Delete,
+    Indexed,
+    Insert,
+    PydanticObjectId,
+    Replace,
+    SaveChanges,
+    Update,
+    after_event,
+    before_event,
+)
 from pydantic import AnyUrl, Field
+from pymongo import IndexModel, UpdateOne
+from pymongo.errors import BulkWriteError
 
+from app.constants import (
+    CHANGES_SETTLE_TIME,
+    CHANGES_TOMBSTONE_TTL,
+    LABEL_RENAME_BATCH_SIZE,
+)
 from app.mongo import BaseDocument
+from app.mongo.change_seq_allocator import change_seq_allocator
+from app.mongo.counter_document import (
+    LABELS_VERSION_COUNTER,
+    NOTES_ORDER_COUNTER,
+    CounterDocument,
+)
+from app.mongo.label_cache import label_cache
+from app.mongo.note_search_index import note_search_index
+from app.mongo.tombstone_document import TombstoneDocument
 from app.utils import logger
 
+DUPLICATE_KEY_ERROR = 11000
+
+NOTE_INDEXES: list[IndexModel] = [
+    IndexModel(
+        [("active", pymongo.ASCENDING), ("updated_at", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)],
+        name="active_updated_at",
+        background=True,
+    ),
+    IndexModel(
+        [
+            ("active", pymongo.ASCENDING),
+            ("archived", pymongo.ASCENDING),
+            ("order", pymongo.ASCENDING),
+            ("_id", pymongo.ASCENDING),
+        ],
+        name="active_archived_order",
+        background=True,
+    ),
+    IndexModel(
+        [("pinned", pymongo.ASCENDING), ("updated_at", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)],
+        name="pinned_updated_at",
+        partialFilterExpression={"pinned": True},
+        background=True,
+    ),
+    IndexModel(
+        [("archived", pymongo.ASCENDING), ("updated_at", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)],
+        name="archived_updated_at",
+        partialFilterExpression={"archived": True},
+        background=True,
+    ),
+    IndexModel([("label_ids", pymongo.ASCENDING)], name="label_ids", background=True),
+    IndexModel([("labels", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)], name="labels_id", background=True),
+    IndexModel(
+        [("change_seq", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)],
+        name="change_seq_id",
+        background=True,
+    ),
+]
+
+LABEL_INDEXES: list[IndexModel] = [
+    IndexModel(
+        [("change_seq", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)],
+        name="change_seq_id",
+        background=True,
+    ),
+]
+
 
 class LabelDocument(BaseDocument):
     label: Indexed(str, unique=True)
 
     class Settings:
         name = "Labels"
+        indexes = [*LABEL_INDEXES]
         use_state_management = True
         state_management_save_previous = True
 
     @staticmethod
     @before_event(Update)
     async def update_notes(event: Update):
+        # Imported on the first rename, python-box is slow to import and only needed here
+        from box import Box
+
         event.updated_at = datetime.utcnow()
         previous_state: Box = Box(event.get_saved_state())
+        if previous_state.label != event.label:
+            modified_count = await LabelDocument.rename_in_notes(previous_state.label, event.label)
+            logger.info(f"Renamed label {previous_state.label} to {event.label} on {modified_count} notes")
+
+    @staticmethod
+    async def rename_in_notes(old_label: str, new_label: str, batch_size: int = LABEL_RENAME_BATCH_SIZE) -> int:
+        """
+        Rewrite a label in place on every note carrying it and return how many notes changed.
+        Notes are rewritten server side in _id ordered batches, a renamed note no longer matches the old label so an
+        interrupted rename resumes where it stopped when run again.
+        """
+        collection = NoteDocument.get_motor_collection()
+        rename_stage = {
+            "$set": {
+                "labels": {
+                    "$reduce": {
+                        "input": "$labels",
+                        "initialValue": [],
+                        "in": {
+                            "$let": {
+                                "vars": {
+                                    "label": {
+                                        "$cond": [
+                                            {"$eq": ["$$this", {"$literal": old_label}]},
+                                            {"$literal": new_label},
+                                            "$$this",
+                                        ]
+                                    }
+                                },
+                                "in": {
+                                    "$cond": [
+                                        {"$in": ["$$label", "$$value"]},
+                                        "$$value",
+                                        {"$concatArrays": ["$$value", ["$$label"]]},
+                                    ]
+                                },
+                            }
+                        },
+                    }
+                }
+            }
+        }
+        modified_count = 0
+        while True:
+            batch_end = (
+                await collection.find({"labels": old_label}, {"_id": 1})
+                .sort("_id", pymongo.ASCENDING)
+                .skip(batch_size - 1)
+                .limit(1)
+                .to_list(1)
+            )
+            batch_filter: dict = {"labels": old_label}
+            if batch_end:
+                batch_filter["_id"] = {"$lte": batch_end[0]["_id"]}
+            change_seq = await change_seq_allocator.next_value()
+            result = await collection.update_many(
+                batch_filter,
+                [rename_stage, {"$set": {"updated_at": datetime.utcnow(), "change_seq": change_seq}}],
+            )
+            modified_count += result.modified_count
+            if result.modified_count:
+                NoteDocument.mark_changed()
+            if not batch_end:
+                return modified_count
+
+    @classmethod
+    async def resolve_ids(cls, labels: list[str]) -> dict[str, PydanticObjectId]:
+        """
+        Map label names to ids from the label cache, looking up the labels it does not hold with one $in query and
+        creating the missing ones with one unordered bulk upsert
+        """
+        labels = list(dict.fromkeys(labels))
+        if not labels:
+            return {}
+        label_ids = await label_cache.get_ids(labels)
+        uncached_labels = [label for label in labels if label not in label_ids]
+        if not uncached_labels:
+            return label_ids
+
+        collection = cls.get_motor_collection()
+        async for document in collection.find({"label": {"$in": uncached_labels}}):
+            label_document = cls.parse_obj(document)
+            label_cache.put(label_document)
+            label_ids[label_document.label] = label_document.id
+        missing_labels = [label for label in uncached_labels if label not in label_ids]
+        if not missing_labels:
+            return label_ids
+
+        now = datetime.utcnow()
+        change_seq = await change_seq_allocator.next_value()
+        upserts = [
+            UpdateOne(
+                {"label": label},
+                {"$setOnInsert": {"label": label, "created_at": now, "updated_at": now, "change_seq": change_seq}},
+                upsert=True,
+            )
+            for label in missing_labels
+        ]
         try:
-            collection = NoteDocument.get_motor_collection()
+            result = await collection.bulk_write(upserts, ordered=False)
+            upserted_ids = result.upserted_ids
+        except BulkWriteError as bulk_write_error:
+            # A concurrent insert of the same label loses on the unique index, the winner is read back below
+            if any(error["code"] != DUPLICATE_KEY_ERROR for error in bulk_write_error.details["writeErrors"]):
+                raise bulk_write_error
+            upserted_ids = {upsert["index"]: upsert["_id"] for upsert in bulk_write_error.details["upserted"]}
+        for index, label_id in upserted_ids.items():
+            label_document = cls(
+                id=label_id,
+                label=missing_labels[index],
+                created_at=now,
+                updated_at=now,
+                change_seq=change_seq,
+            )
+            label_cache.put(label_document)
+            label_ids[label_document.label] = label_document.id
+        if upserted_ids:
+            await label_cache.bump_version()
+
+        unresolved_labels = [label for label in missing_labels if label not in label_ids]
+        if unresolved_labels:
+            async for document in collection.find({"label": {"$in": unresolved_labels}}):
+                label_document = cls.parse_obj(document)
+                label_cache.put(label_document)
+                label_ids[label_document.label] = label_document.id
+        return label_ids
 
-            cursor = collection.find({"labels": previous_state.label}, {"_id": 1})
-            ids = [doc["_id"] for doc in await cursor.to_list(length=None)]
+    @after_event(Insert, Replace, Update, SaveChanges)
+    async def cache_label(self):
+        label_cache.put(self)
+        await label_cache.bump_version()
 
-            await collection.update_many({"_id": {"$in": ids}}, {"$pull": {"labels": previous_state.label}})
+    @after_event(Delete)
+    async def evict_label(self):
+        label_cache.remove(self)
+        await label_cache.bump_version()
 
-            await collection.update_many({"_id": {"$in": ids}}, {"$addToSet": {"labels": event.label}})
-        except Exception as exception:
-            logger.error(f"Cannot update notes: {exception}")
+    @after_event(Delete)
+    async def record_label_tombstone(self):
+        await TombstoneDocument.record("label", [self.id])
+
+    @staticmethod
+    async def get_version() -> int:
+        return (await CounterDocument.get_values([LABELS_VERSION_COUNTER]))[LABELS_VERSION_COUNTER]
 
     @before_event(Delete)
     async def remove_from_notes(self):
-        await NoteDocument.get_motor_collection().update_many(
-            {"label_ids": self.id}, {"$pull": {"label_ids": self.id, "labels": self.label}}
+        change_seq = await change_seq_allocator.next_value()
+        result = await NoteDocument.get_motor_collection().update_many(
+            {"label_ids": self.id},
+            {
+                "$pull": {"label_ids": self.id, "labels": self.label},
+                "$set": {"updated_at": datetime.utcnow(), "change_seq": change_seq},
+            },
         )
+        if result.modified_count:
+            NoteDocument.mark_changed()
 
 
 class NoteDocument(BaseDocument):
@@ -66,16 +284,14 @@ class NoteDocument(BaseDocument):
             [
                 ("order", pymongo.ASCENDING),
             ],
+            *NOTE_INDEXES,
         ]
 
     @before_event(Insert)
     async def set_label_ids(self):
-        if len(self.labels) > 0:
-            for label in self.labels:
-                label_document = await LabelDocument.find_one({"label": label})
-                if label_document is None:
-                    label_document = await LabelDocument(label=label).insert()
-                self.label_ids.append(label_document.id)
+        if self.labels:
+            label_ids = await LabelDocument.resolve_ids(self.labels)
+            self.label_ids = list(dict.fromkeys(label_ids[label] for label in self.labels))
 
     @before_event(Update)
     async def set_updated_at(self):
@@ -83,8 +299,62 @@ class NoteDocument(BaseDocument):
 
     @before_event(Insert)
     async def set_order(self):
-        max_order_number = await NoteDocument.find_all().sort(("order", pymongo.DESCENDING)).to_list(1)
-        if max_order_number:
-            self.order = max_order_number[0].order + 1
+        self.order = await CounterDocument.next_value(NOTES_ORDER_COUNTER)
+
+    @after_event(Insert, Replace, Update, SaveChanges)
+    async def index_note(self):
+        if self.active:
+            note_search_index.put(self.id, self.title, self.notes, self.labels)
         else:
-            self.order = 1
+            note_search_index.remove(self.id)
+
+    @after_event(Delete)
+    async def unindex_note(self):
+        note_search_index.remove(self.id)
+
+    @after_event(Delete)
+    async def record_note_tombstone(self):
+        await TombstoneDocument.record("note", [self.id])
+
+    @staticmethod
+    def mark_changed() -> None:
+        """
+        Called after raw writes that bypass the document events, so the search index picks them up on the next query
+        """
+        note_search_index.expire()
+
+    @staticmethod
+    async def get_version() -> Optional[tuple[datetime, int]]:
+        """
+        Version of the notes behind the listing ETags, read from the newest updated_at and deleted_at on their indexes
+        so writes bump no shared counter. None while the newest change is within the settle time, a write stamped
+        before it may still be landing. The tombstone expiry period is part of the version so that a deletion
+        expiring from the tombstones never brings back the version from before it.
+        """
+        newest_note, newest_tombstone = await asyncio.gather(
+            NoteDocument.get_motor_collection().find_one(
+                {"active": {"$in": [True, False]}},
+                {"updated_at": 1},
+                sort=[("updated_at", pymongo.DESCENDING)],
+            ),
+            TombstoneDocument.get_motor_collection().find_one(
+                {},
+                {"deleted_at": 1},
+                sort=[("deleted_at", pymongo.DESCENDING)],
+            ),
+        )
+        changed_at = max(
+            (newest_note or {}).get("updated_at") or datetime.min,
+            (newest_tombstone or {}).get("deleted_at") or datetime.min,
+        )
+        if datetime.utcnow() - changed_at < timedelta(seconds=CHANGES_SETTLE_TIME):
+            return None
+        return changed_at, int(time.time() // CHANGES_TOMBSTONE_TTL)
+
+    @classmethod
+    async def seed_order_counter(cls):
+        """
+        Start the order sequence after the highest order already stored, for deployments predating the counter
+        """
+        last_note = await cls.find_all().sort(("order", pymongo.DESCENDING)).limit(1).to_list()
+        await CounterDocument.seed(NOTES_ORDER_COUNTER, last_note[0].order if last_note else 0)
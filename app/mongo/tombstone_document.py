@@ -0,0 +1,55 @@
+from datetime import datetime
+
+import pymongo
+from beanie import Document, PydanticObjectId
+from pydantic import Field
+from pymongo import IndexModel, UpdateOne
+
+from app.constants import CHANGES_TOMBSTONE_TTL, TOMBSTONE_KIND_LITERAL
+from app.mongo.change_seq_allocator import change_seq_allocator
+
+
+class TombstoneDocument(Document):
+    """
+    Trace of a permanently deleted note or label, keyed by its id, for the delta sync to report until it expires
+    """
+
+    id: PydanticObjectId
+    kind: TOMBSTONE_KIND_LITERAL
+    change_seq: int
+    deleted_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "Tombstones"
+        indexes = [
+            IndexModel(
+                [("change_seq", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)],
+                name="change_seq_id",
+            ),
+            IndexModel(
+                [("deleted_at", pymongo.ASCENDING)],
+                name="deleted_at_ttl",
+                expireAfterSeconds=CHANGES_TOMBSTONE_TTL,
+            ),
+        ]
+
+    @classmethod
+    async def record(cls, kind: TOMBSTONE_KIND_LITERAL, deleted_ids: list[PydanticObjectId]) -> None:
+        """
+        Record the deletion of the given ids with one unordered bulk upsert, recording a deletion twice is harmless
+        """
+        if not deleted_ids:
+            return
+        change_seq = await change_seq_allocator.next_value()
+        deleted_at = datetime.utcnow()
+        await cls.get_motor_collection().bulk_write(
+            [
+                UpdateOne(
+                    {"_id": deleted_id},
+                    {"$set": {"kind": kind, "change_seq": change_seq, "deleted_at": deleted_at}},
+                    upsert=True,
+                )
+                for deleted_id in deleted_ids
+            ],
+            ordered=False,
+        )
@@ -1,27 +1,38 @@
+from beanie.exceptions import CollectionWasNotInitialized, DocumentWasNotSaved
 from fastapi import APIRouter, UploadFile
-from firebase_admin.exceptions import FirebaseError, InternalError, UnknownError
 
 from app.constants import DEFAULT_ROUTER_SETTINGS
 from app.controller import ImageController
 from app.model import CommonResponseModel
-from app.utils import logger
+from app.storage import StorageError
+from app.utils import DocumentJSONRoute, logger
 
 image_router: APIRouter = APIRouter(
     tags=["Image"],
+    route_class=DocumentJSONRoute,
 )
 
 
 @image_router.post("/upload", name="Upload an image", **DEFAULT_ROUTER_SETTINGS)
-def upload_image(file: UploadFile) -> CommonResponseModel:
+async def upload_image(file: UploadFile) -> CommonResponseModel:
+    """
+    Upload an image, streamed to the storage backend in chunks on the dedicated upload executor.
+    Images are stored under the hash of their content, uploading the same image again returns the stored one.
+    WebP thumbnail and medium variants are generated on a process pool and returned as `thumbnail_url` and `medium_url`.
+    """
     try:
-        response: CommonResponseModel = ImageController.upload(file)
+        response: CommonResponseModel = await ImageController.upload(file)
         return response
-    except (FirebaseError, UnknownError, InternalError) as firebase_error:
+    except (
+        StorageError,
+        DocumentWasNotSaved,
+        CollectionWasNotInitialized,
+    ) as storage_error:
         logger.error(
-            f"Error while uploading image: {firebase_error}",
+            f"Error while uploading image: {storage_error}",
         )
         return CommonResponseModel(
             status="failure",
-            message=f"Error while uploading image: {firebase_error}",
-            error=str(firebase_error),
+            message=f"Error while uploading image: {storage_error}",
+            error=str(storage_error),
         )
@@ -1,22 +1,37 @@
+from typing import Optional, Union
+
 from beanie import PydanticObjectId
 from beanie.exceptions import CollectionWasNotInitialized, DocumentWasNotSaved
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
 
-from app.constants import DEFAULT_ROUTER_SETTINGS
+from app.constants import DEFAULT_ROUTER_SETTINGS, NOTE_VIEW_LITERAL
 from app.controller import LabelController
+from app.database import LabelNameTakenError
 from app.model import CommonResponseModel, UpdateLabelRequestModel
+from app.utils import (
+    DocumentJSONRoute,
+    InvalidQueryError,
+    accepts_ndjson,
+    etag_matches,
+    not_modified,
+)
 
 labels_router = APIRouter(
     tags=["Labels"],
+    route_class=DocumentJSONRoute,
 )
 
 
 @labels_router.get("", name="Get all labels", **DEFAULT_ROUTER_SETTINGS)
-async def get() -> CommonResponseModel:
+async def get(request: Request, http_response: Response) -> Union[CommonResponseModel, Response]:
     """
-    Get all labels
+    Get all labels, send the ETag back as If-None-Match to get a 304 while no label changed
     """
     try:
+        etag = await LabelController.get_labels_etag()
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        http_response.headers["ETag"] = etag
         response: CommonResponseModel = await LabelController.get_all_labels()
         return response
     except (DocumentWasNotSaved, CollectionWasNotInitialized) as beanie_exception:
@@ -28,12 +43,28 @@ async def get() -> CommonResponseModel:
 
 
 @labels_router.get("/notes", name="Get all notes for each label", **DEFAULT_ROUTER_SETTINGS)
-async def get_all_notes_by_label_id(label_id: PydanticObjectId) -> CommonResponseModel:
+async def get_all_notes_by_label_id(
+    request: Request,
+    http_response: Response,
+    label_id: PydanticObjectId,
+    view: NOTE_VIEW_LITERAL = "full",
+    fields: Optional[str] = None,
+) -> Union[CommonResponseModel, Response]:
     """
-    Get all notes for each label
+    Get all notes for each label, streamed one per line with `Accept: application/x-ndjson`
     """
     try:
-        response: CommonResponseModel = await LabelController.get_all_notes_by_label_id(label_id)
+        etag = await LabelController.get_label_notes_etag(accepts_ndjson(request), label_id, view, fields)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        if accepts_ndjson(request):
+            streaming_response = LabelController.stream_notes_by_label_id(label_id, view, fields)
+            if etag is not None:
+                streaming_response.headers["ETag"] = etag
+            return streaming_response
+        if etag is not None:
+            http_response.headers["ETag"] = etag
+        response: CommonResponseModel = await LabelController.get_all_notes_by_label_id(label_id, view, fields)
         return response
     except (DocumentWasNotSaved, CollectionWasNotInitialized) as beanie_exception:
         return CommonResponseModel(
@@ -41,6 +72,12 @@ async def get_all_notes_by_label_id(label_id: PydanticObjectId) -> CommonRespons
             message=f"Error while fetching labels: {beanie_exception}",
             error=str(beanie_exception),
         )
+    except InvalidQueryError as query_error:
+        return CommonResponseModel(
+            status="failure",
+            message=f"Invalid notes query: {query_error}",
+            error=str(query_error),
+        )
 
 
 @labels_router.put("", name="Edit an existing label", **DEFAULT_ROUTER_SETTINGS)
@@ -51,6 +88,12 @@ async def update(request: UpdateLabelRequestModel) -> CommonResponseModel:
     try:
         response: CommonResponseModel = await LabelController.update(request)
         return response
+    except LabelNameTakenError as name_error:
+        return CommonResponseModel(
+            status="failure",
+            message=f"Error while updating label: {name_error}",
+            error=str(name_error),
+        )
     except (DocumentWasNotSaved, CollectionWasNotInitialized) as beanie_exception:
         return CommonResponseModel(
             status="failure",
@@ -1,18 +1,36 @@
+from typing import Optional, Union
+
 from beanie import PydanticObjectId
 from beanie.exceptions import CollectionWasNotInitialized, DocumentWasNotSaved
-from fastapi import APIRouter
+from fastapi import APIRouter, Query, Request, Response
+from starlette.responses import StreamingResponse
 
-from app.constants import DEFAULT_ROUTER_SETTINGS
+from app.constants import (
+    DEFAULT_PAGE_SIZE,
+    DEFAULT_ROUTER_SETTINGS,
+    MAX_PAGE_SIZE,
+    NOTE_VIEW_LITERAL,
+)
 from app.controller import NotesController
 from app.model import (
+    BatchNoteRequestModel,
+    BulkNoteRequestModel,
     CommonResponseModel,
     CreateNoteModel,
     DeleteLabelFromNoteModel,
     UpdateNoteModel,
 )
+from app.utils import (
+    DocumentJSONRoute,
+    InvalidQueryError,
+    accepts_ndjson,
+    etag_matches,
+    not_modified,
+)
 
 notes_router = APIRouter(
     tags=["Notes"],
+    route_class=DocumentJSONRoute,
 )
 
 
@@ -102,18 +120,53 @@ async def remove_label(request: DeleteLabelFromNoteModel) -> CommonResponseModel
     **DEFAULT_ROUTER_SETTINGS,
 )
 async def get(
+    request: Request,
+    http_response: Response,
     get_trash: bool = False,
     get_pinned: bool = False,
     get_archived: bool = False,
-) -> CommonResponseModel:
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    view: NOTE_VIEW_LITERAL = "full",
+    fields: Optional[str] = None,
+) -> Union[CommonResponseModel, Response]:
     """
-    Get all notes based on active, trash and pinned status
+    Get a page of notes based on active, trash and pinned status, pass next_cursor back as cursor for the next page.
+    With `Accept: application/x-ndjson` every note from the cursor onwards is streamed instead, one per line.
+    `view=summary` or a comma separated `fields` list returns only those fields of each note.
+    Responses carry an ETag once the last note write settled, send it back as If-None-Match to get a 304 while no note
+    changed.
     """
     try:
+        etag = await NotesController.get_notes_etag(
+            accepts_ndjson(request),
+            get_trash,
+            get_pinned,
+            get_archived,
+            limit,
+            cursor,
+            view,
+            fields,
+        )
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        if accepts_ndjson(request):
+            streaming_response = NotesController.stream_all_notes(
+                get_trash, get_pinned, get_archived, cursor, view, fields
+            )
+            if etag is not None:
+                streaming_response.headers["ETag"] = etag
+            return streaming_response
+        if etag is not None:
+            http_response.headers["ETag"] = etag
         response: CommonResponseModel = await NotesController.get_all_notes(
             get_trash,
             get_pinned,
             get_archived,
+            limit,
+            cursor,
+            view,
+            fields,
         )
         return response
     except (DocumentWasNotSaved, CollectionWasNotInitialized) as beanie_exception:
@@ -122,11 +175,42 @@ async def get(
             message=f"Error while fetching notes: {beanie_exception}",
             error=str(beanie_exception),
         )
-    except ValueError as value_error:
+    except InvalidQueryError as query_error:
+        return CommonResponseModel(
+            status="failure",
+            message=f"Invalid notes query: {query_error}",
+            error=str(query_error),
+        )
+
+
+@notes_router.get(
+    "/changes",
+    name="Get note changes",
+    **DEFAULT_ROUTER_SETTINGS,
+)
+async def get_changes(
+    since: Optional[str] = None,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+) -> CommonResponseModel:
+    """
+    Notes and labels written after the `since` token, with the ids of the notes and labels deleted permanently in
+    `deleted_notes` and `deleted_labels`. Pass `next_cursor` back as `since` on the next call, and call again right away
+    while `has_more` is true. Without `since` every note and label is returned, a page at a time.
+    """
+    try:
+        response: CommonResponseModel = await NotesController.get_changes(since, limit)
+        return response
+    except (DocumentWasNotSaved, CollectionWasNotInitialized) as beanie_exception:
+        return CommonResponseModel(
+            status="failure",
+            message=f"Error while fetching changes: {beanie_exception}",
+            error=str(beanie_exception),
+        )
+    except InvalidQueryError as query_error:
         return CommonResponseModel(
             status="failure",
-            message="Get pinned and get trash cannot be true at the same time",
-            error=str(value_error),
+            message=f"Invalid changes query: {query_error}",
+            error=str(query_error),
         )
 
 
@@ -170,17 +254,120 @@ async def archive_note(note_id: PydanticObjectId, un_archive: bool = False) -> C
         )
 
 
+@notes_router.post(
+    "/batch",
+    name="Apply notes batch",
+    **DEFAULT_ROUTER_SETTINGS,
+)
+async def batch(request: BatchNoteRequestModel) -> CommonResponseModel:
+    """
+    Apply a mixed list of create, update and delete operations in one unordered bulk write, with a result per operation
+    """
+    try:
+        response: CommonResponseModel = await NotesController.batch(request)
+        return response
+    except (DocumentWasNotSaved, CollectionWasNotInitialized) as beanie_exception:
+        return CommonResponseModel(
+            status="failure",
+            message=f"Error while applying notes batch: {beanie_exception}",
+            error=str(beanie_exception),
+        )
+
+
+@notes_router.delete(
+    "/bulk",
+    name="Delete notes",
+    **DEFAULT_ROUTER_SETTINGS,
+)
+async def delete_notes(request: BulkNoteRequestModel, is_permanent: bool = False) -> CommonResponseModel:
+    """
+    Delete multiple notes with a single database command
+    """
+    try:
+        response: CommonResponseModel = await NotesController.delete_notes(request, is_permanent)
+        return response
+    except (DocumentWasNotSaved, CollectionWasNotInitialized) as beanie_exception:
+        return CommonResponseModel(
+            status="failure",
+            message=f"Error while deleting notes: {beanie_exception}",
+            error=str(beanie_exception),
+        )
+
+
+@notes_router.put(
+    "/pin/bulk",
+    name="Pin notes",
+    **DEFAULT_ROUTER_SETTINGS,
+)
+async def pin_notes(request: BulkNoteRequestModel, unpin: bool = False) -> CommonResponseModel:
+    """
+    Pin or Unpin multiple notes with a single database command
+    """
+    try:
+        response: CommonResponseModel = await NotesController.pin_notes(request, unpin)
+        return response
+    except (DocumentWasNotSaved, CollectionWasNotInitialized) as beanie_exception:
+        return CommonResponseModel(
+            status="failure",
+            message=f"Error while pinning notes: {beanie_exception}",
+            error=str(beanie_exception),
+        )
+
+
+@notes_router.put(
+    "/archive/bulk",
+    name="Archive notes",
+    **DEFAULT_ROUTER_SETTINGS,
+)
+async def archive_notes(request: BulkNoteRequestModel, un_archive: bool = False) -> CommonResponseModel:
+    """
+    Archive or Un Archive multiple notes with a single database command
+    """
+    try:
+        response: CommonResponseModel = await NotesController.archive_notes(request, un_archive)
+        return response
+    except (DocumentWasNotSaved, CollectionWasNotInitialized) as beanie_exception:
+        return CommonResponseModel(
+            status="failure",
+            message=f"Error while archiving notes: {beanie_exception}",
+            error=str(beanie_exception),
+        )
+
+
 @notes_router.get(
     "/search",
     name="Search notes",
     **DEFAULT_ROUTER_SETTINGS,
 )
-async def search_note(search_text: str) -> CommonResponseModel:
+async def search_note(
+    request: Request,
+    search_text: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    pinned: Optional[bool] = None,
+    archived: Optional[bool] = None,
+    label_id: Optional[PydanticObjectId] = None,
+    view: NOTE_VIEW_LITERAL = "full",
+    fields: Optional[str] = None,
+) -> Union[CommonResponseModel, StreamingResponse]:
     """
-    Search notes based on title, label and note
+    Search notes based on title, label and note, most relevant first with their text `score`.
+    Narrow the results with `pinned`, `archived` and `label_id`, pass `next_cursor` back as `cursor` to get the next
+    page, or stream every result one per line with `Accept: application/x-ndjson`.
     """
     try:
-        response: CommonResponseModel = await NotesController.search_note(search_text)
+        if accepts_ndjson(request):
+            return NotesController.stream_search_note(search_text, cursor, pinned, archived, label_id, view, fields)
+        response: CommonResponseModel = await NotesController.search_note(
+            search_text,
+            limit,
+            cursor,
+            pinned,
+            archived,
+            label_id,
+            view,
+            fields,
+        )
         return response
     except (DocumentWasNotSaved, CollectionWasNotInitialized) as beanie_exception:
         return CommonResponseModel(
@@ -188,3 +375,42 @@ async def search_note(search_text: str) -> CommonResponseModel:
             message=f"Error while searching note: {beanie_exception}",
             error=str(beanie_exception),
         )
+    except InvalidQueryError as query_error:
+        return CommonResponseModel(
+            status="failure",
+            message=f"Invalid search query: {query_error}",
+            error=str(query_error),
+        )
+
+
+@notes_router.get(
+    "/search/suggest",
+    name="Search notes as you type",
+    **DEFAULT_ROUTER_SETTINGS,
+)
+async def suggest_notes(
+    search_text: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    view: NOTE_VIEW_LITERAL = "full",
+    fields: Optional[str] = None,
+) -> CommonResponseModel:
+    """
+    Ranked notes whose title, notes or labels contain a word starting with each word of the search text.
+    Pass `next_cursor` back as `cursor` to get the next page.
+    """
+    try:
+        response: CommonResponseModel = await NotesController.suggest_notes(search_text, limit, cursor, view, fields)
+        return response
+    except (DocumentWasNotSaved, CollectionWasNotInitialized) as beanie_exception:
+        return CommonResponseModel(
+            status="failure",
+            message=f"Error while suggesting notes: {beanie_exception}",
+            error=str(beanie_exception),
+        )
+    except InvalidQueryError as query_error:
+        return CommonResponseModel(
+            status="failure",
+            message=f"Invalid search query: {query_error}",
+            error=str(query_error),
+        )
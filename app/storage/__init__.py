@@ -0,0 +1,45 @@
+from app.constants import IMAGE_VARIANT_QUALITY, IMAGE_VARIANT_SIZES
+from app.storage.firebase_storage import FirebaseStorageBackend
+from app.storage.image_processor import VARIANT_CONTENT_TYPE, image_processor
+from app.storage.local_storage import LocalStorageBackend
+from app.storage.storage_backend import (
+    StorageBackend,
+    StorageError,
+    UploadTooLargeError,
+)
+from app.storage.upload_executor import upload_executor
+
+
+def init_storage(settings):
+    if settings.STORAGE_BACKEND == "local":
+        backend: StorageBackend = LocalStorageBackend(settings.LOCAL_STORAGE_PATH, settings.LOCAL_STORAGE_URL)
+    else:
+        backend = FirebaseStorageBackend(
+            settings.FIREBASE_CREDENTIALS_PATH,
+            settings.FIREBASE_STORAGE_BUCKET,
+            settings.UPLOAD_CHUNK_SIZE,
+        )
+    upload_executor.configure(
+        backend,
+        max_concurrency=settings.UPLOAD_CONCURRENCY,
+        chunk_size=settings.UPLOAD_CHUNK_SIZE,
+        max_size=settings.UPLOAD_MAX_SIZE,
+    )
+    image_processor.configure(
+        max_workers=settings.IMAGE_PROCESSING_WORKERS,
+        sizes=IMAGE_VARIANT_SIZES,
+        quality=IMAGE_VARIANT_QUALITY,
+    )
+
+
+__all__ = [
+    "init_storage",
+    "StorageBackend",
+    "StorageError",
+    "UploadTooLargeError",
+    "FirebaseStorageBackend",
+    "LocalStorageBackend",
+    "upload_executor",
+    "image_processor",
+    "VARIANT_CONTENT_TYPE",
+]
@@ -0,0 +1,59 @@
+import threading
+from typing import Any, Iterable, Optional
+
+from app.storage.storage_backend import StorageBackend, StorageError
+
+
+class FirebaseStorageBackend(StorageBackend):
+    """
+    Stores objects in the Firebase storage bucket through resumable chunked uploads.
+
+    The Firebase app and the bucket are created on the first upload and kept, so workers that never store an image
+    neither import the Firebase SDK nor read the credentials.
+    """
+
+    def __init__(self, credentials_path: str, bucket_name: str, chunk_size: int) -> None:
+        self.credentials_path = credentials_path
+        self.bucket_name = bucket_name
+        self.chunk_size = chunk_size
+        self._bucket: Any = None
+        self._lock = threading.Lock()
+
+    def write(self, name: str, chunks: Iterable[bytes], content_type: Optional[str]) -> str:
+        from firebase_admin.exceptions import FirebaseError
+        from google.api_core.exceptions import GoogleAPIError
+        from google.auth.exceptions import GoogleAuthError
+
+        blob = self._get_bucket().blob(name)
+        try:
+            writer = blob.open("wb", chunk_size=self.chunk_size, content_type=content_type)
+            for chunk in chunks:
+                writer.write(chunk)
+            writer.close()
+        except (GoogleAPIError, GoogleAuthError, FirebaseError) as google_api_error:
+            raise StorageError(f"Error while uploading {name}: {google_api_error}") from google_api_error
+        return blob.public_url
+
+    def _get_bucket(self) -> Any:
+        if self._bucket is not None:
+            return self._bucket
+        # Uploads run on several threads, the first ones would race to create the app
+        with self._lock:
+            if self._bucket is None:
+                import firebase_admin
+                from firebase_admin import credentials, storage
+
+                try:
+                    firebase_app = firebase_admin.get_app()
+                except ValueError:
+                    try:
+                        firebase_app = firebase_admin.initialize_app(
+                            credentials.Certificate(self.credentials_path),
+                            {"storageBucket": self.bucket_name},
+                        )
+                    except (OSError, ValueError) as credentials_error:
+                        raise StorageError(f"Firebase could not be initialized: {credentials_error}") from (
+                            credentials_error
+                        )
+                self._bucket = storage.bucket(self.bucket_name, app=firebase_app)
+        return self._bucket
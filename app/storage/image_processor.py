@@ -0,0 +1,84 @@
+import asyncio
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from app.utils import logger
+
+VARIANT_FORMAT = "WEBP"
+VARIANT_CONTENT_TYPE = "image/webp"
+
+
+def render_variants(data: bytes, sizes: dict[str, int], quality: int) -> dict[str, bytes]:
+    """
+    Render a WebP variant of the image fitting in a size x size box for each variant, run in the worker processes
+    """
+    # Only the worker processes load Pillow
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image = ImageOps.exif_transpose(image)
+            image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+            variants = {}
+            for name, size in sizes.items():
+                variant = image.copy()
+                variant.thumbnail((size, size), Image.Resampling.LANCZOS)
+                buffer = io.BytesIO()
+                variant.save(buffer, VARIANT_FORMAT, quality=quality, method=4)
+                variants[name] = buffer.getvalue()
+            return variants
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        return {}
+
+
+class ImageProcessor:
+    """
+    Renders the resized variants of uploaded images on a process pool, off the event loop and the GIL
+    """
+
+    def __init__(self) -> None:
+        self.sizes: dict[str, int] = {}
+        self.quality = 0
+        self.max_workers = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def configure(self, max_workers: int, sizes: dict[str, int], quality: int) -> None:
+        self.shutdown()
+        self.sizes = sizes
+        self.quality = quality
+        self.max_workers = max_workers
+        self._executor = self._create_executor()
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        # Spawned workers do not inherit the event loop and driver threads of the API process
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def render(self, data: bytes) -> dict[str, bytes]:
+        """
+        WebP bytes of each variant by name, empty when the data is not an image the processor can decode or when a
+        worker died rendering it, in which case the pool is replaced for the next uploads
+        """
+        executor = self._executor
+        if executor is None:
+            return {}
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(executor, render_variants, data, self.sizes, self.quality)
+        except BrokenProcessPool:
+            # Concurrent renders see the same broken pool, only the first one replaces it
+            if self._executor is executor:
+                logger.warning("An image processing worker died, replacing the process pool")
+                executor.shutdown(wait=False)
+                self._executor = self._create_executor()
+            return {}
+
+
+image_processor = ImageProcessor()
@@ -0,0 +1,36 @@
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterable, Optional
+from urllib.parse import quote
+
+from app.storage.storage_backend import StorageBackend, StorageError
+
+
+class LocalStorageBackend(StorageBackend):
+    """
+    Stores objects in a directory served by the API itself, for development and offline testing
+    """
+
+    def __init__(self, root: str, base_url: str) -> None:
+        self.root = Path(root).resolve()
+        self.base_url = base_url.rstrip("/")
+
+    def write(self, name: str, chunks: Iterable[bytes], content_type: Optional[str]) -> str:
+        path = (self.root / name).resolve()
+        if self.root not in path.parents:
+            raise StorageError(f"Invalid object name: {name}")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write next to the target and rename, so a failed upload never leaves a partial object behind
+            with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as temporary_file:
+                try:
+                    for chunk in chunks:
+                        temporary_file.write(chunk)
+                except BaseException:
+                    os.unlink(temporary_file.name)
+                    raise
+            os.replace(temporary_file.name, path)
+        except OSError as os_error:
+            raise StorageError(f"Error while writing {name}: {os_error}") from os_error
+        return f"{self.base_url}/{quote(path.relative_to(self.root).as_posix())}"
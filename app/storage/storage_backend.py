@@ -0,0 +1,26 @@
+from abc import ABC, abstractmethod
+from typing import Iterable, Optional
+
+
+class StorageError(Exception):
+    """
+    Raised when a storage backend fails to store an object
+    """
+
+
+class UploadTooLargeError(StorageError):
+    """
+    Raised when an upload exceeds the configured size limit
+    """
+
+
+class StorageBackend(ABC):
+    """
+    Blob store the uploaded images are written to. Methods are blocking and run on the upload executor threads.
+    """
+
+    @abstractmethod
+    def write(self, name: str, chunks: Iterable[bytes], content_type: Optional[str]) -> str:
+        """
+        Store the streamed chunks under the given name and return the public url of the stored object
+        """
@@ -0,0 +1,137 @@
+import asyncio
+import hashlib
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, Optional
+
+from app.storage.storage_backend import (
+    StorageBackend,
+    StorageError,
+    UploadTooLargeError,
+)
+from app.utils.metrics import UPLOAD_BYTES, UPLOAD_LATENCY
+
+
+class UploadExecutor:
+    """
+    Runs uploads to the storage backend on a dedicated bounded thread pool, isolated from Starlette's threadpool.
+
+    At most max_concurrency uploads run at a time, further uploads wait on the event loop for a free slot instead of
+    queueing work behind the busy threads.
+    """
+
+    def __init__(self) -> None:
+        self.backend: Optional[StorageBackend] = None
+        self.chunk_size = 0
+        self.max_size = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def configure(self, backend: StorageBackend, max_concurrency: int, chunk_size: int, max_size: int) -> None:
+        self.shutdown()
+        self.backend = backend
+        self.chunk_size = chunk_size
+        self.max_size = max_size
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="upload")
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def digest(self, file: BinaryIO) -> tuple[str, int]:
+        """
+        SHA-256 hex digest and size of the file, read in chunks and stopped as soon as the size limit is exceeded
+        """
+        return await self._run(self._digest, file)
+
+    async def read(self, file: BinaryIO) -> bytes:
+        """
+        Whole content of the file, read off the event loop
+        """
+        return await self._run(self._read, file)
+
+    async def spool(self, file: BinaryIO) -> BinaryIO:
+        """
+        Copy of the file owned by the caller, who closes it, held in memory up to a chunk and on disk beyond
+        """
+        return await self._run(self._spool, file)
+
+    async def upload(self, name: str, file: BinaryIO, content_type: Optional[str]) -> str:
+        """
+        Stream the file to the storage backend in chunks and return the url of the stored object
+        """
+        return await self._run(self._upload, name, file, content_type)
+
+    async def upload_bytes(self, name: str, data: bytes, content_type: Optional[str]) -> str:
+        """
+        Store generated content with the storage backend and return the url of the stored object
+        """
+        return await self._run(self._write, "variant", name, [data], content_type)
+
+    async def _run(self, function: Callable[..., Any], *args: Any) -> Any:
+        if self._executor is None or self._slots is None:
+            raise StorageError("Storage is not initialized")
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, function, *args)
+
+    def _digest(self, file: BinaryIO) -> tuple[str, int]:
+        file.seek(0)
+        sha256 = hashlib.sha256()
+        size = 0
+        for chunk in self._read_chunks(file):
+            size += len(chunk)
+            if size > self.max_size:
+                raise UploadTooLargeError(f"Upload exceeds the limit of {self.max_size} bytes")
+            sha256.update(chunk)
+        return sha256.hexdigest(), size
+
+    @staticmethod
+    def _read(file: BinaryIO) -> bytes:
+        file.seek(0)
+        return file.read()
+
+    def _spool(self, file: BinaryIO) -> BinaryIO:
+        file.seek(0)
+        copy = tempfile.SpooledTemporaryFile(max_size=self.chunk_size)
+        for chunk in self._read_chunks(file):
+            copy.write(chunk)
+        copy.seek(0)
+        return copy  # type: ignore
+
+    def _upload(self, name: str, file: BinaryIO, content_type: Optional[str]) -> str:
+        file.seek(0, 2)
+        size = file.tell()
+        if size > self.max_size:
+            raise UploadTooLargeError(f"{name} is {size} bytes, the limit is {self.max_size} bytes")
+        file.seek(0)
+        return self._write("original", name, self._read_chunks(file), content_type)
+
+    def _write(self, kind: str, name: str, chunks: Iterable[bytes], content_type: Optional[str]) -> str:
+        started_at = time.perf_counter()
+        status = "failure"
+        size = 0
+
+        def counted_chunks() -> Iterator[bytes]:
+            nonlocal size
+            for chunk in chunks:
+                size += len(chunk)
+                yield chunk
+
+        try:
+            url = self.backend.write(name, counted_chunks(), content_type)
+            status = "success"
+            return url
+        finally:
+            UPLOAD_LATENCY.labels(kind, status).observe(time.perf_counter() - started_at)
+            UPLOAD_BYTES.labels(kind).inc(size)
+
+    def _read_chunks(self, file: BinaryIO) -> Iterator[bytes]:
+        while chunk := file.read(self.chunk_size):
+            yield chunk
+
+
+upload_executor = UploadExecutor()
@@ -1,5 +1,39 @@
-from app.utils.logger import logger
+from app.utils.body_limit import BodySizeLimitMiddleware
+from app.utils.etag import etag_matches, make_etag, not_modified
+from app.utils.json_response import DocumentJSONResponse, DocumentJSONRoute
+from app.utils.logger import init_logging, logger
+from app.utils.metrics import MetricsMiddleware, MongoCommandListener, metrics_response
+from app.utils.pagination import (
+    InvalidQueryError,
+    decode_change_token,
+    decode_cursor,
+    encode_change_token,
+    encode_cursor,
+    keyset_filter,
+)
+from app.utils.request_id import RequestIdMiddleware, request_id_var
+from app.utils.streaming import accepts_ndjson, ndjson_response
 
 __all__ = [
     "logger",
+    "init_logging",
+    "RequestIdMiddleware",
+    "request_id_var",
+    "encode_cursor",
+    "decode_cursor",
+    "keyset_filter",
+    "InvalidQueryError",
+    "encode_change_token",
+    "decode_change_token",
+    "accepts_ndjson",
+    "ndjson_response",
+    "make_etag",
+    "etag_matches",
+    "not_modified",
+    "BodySizeLimitMiddleware",
+    "DocumentJSONResponse",
+    "DocumentJSONRoute",
+    "MetricsMiddleware",
+    "MongoCommandListener",
+    "metrics_response",
 ]
@@ -0,0 +1,63 @@
+from starlette.exceptions import HTTPException
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.model import CommonResponseModel
+
+
+class BodyTooLargeError(HTTPException):
+    """
+    Raised from receive, an HTTPException so the body parser lets it through as a 413 response
+    """
+
+    def __init__(self, max_size: int) -> None:
+        super().__init__(status_code=413, detail=f"Request body exceeds {max_size} bytes")
+
+
+class BodySizeLimitMiddleware:
+    """
+    Reject request bodies larger than max_size on the given path while they are received, before they are spooled.
+
+    The body is only read as fast as the application consumes it, so a client streaming an oversized upload is cut
+    off at the limit instead of filling the disk first.
+    """
+
+    def __init__(self, app: ASGIApp, max_size: int, path: str) -> None:
+        self.app = app
+        self.max_size = max_size
+        self.path = path
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path):
+            await self.app(scope, receive, send)
+            return
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_size:
+            await self._reject(send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            received += len(message.get("body", b""))
+            if received > self.max_size:
+                raise BodyTooLargeError(self.max_size)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    async def _reject(self, send: Send) -> None:
+        body = CommonResponseModel(
+            status="failure",
+            message=f"Request body exceeds {self.max_size} bytes",
+            error="Request body too large",
+        ).json(exclude_none=True)
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 413,
+                "headers": [(b"content-type", b"application/json"), (b"connection", b"close")],
+            }
+        )
+        await send({"type": "http.response.body", "body": body.encode()})
@@ -0,0 +1,30 @@
+import hashlib
+from typing import Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+
+def make_etag(*parts) -> str:
+    """
+    Strong ETag derived from a collection version and the parameters that shape the representation
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: Optional[str]) -> bool:
+    """
+    Whether the client already holds this representation according to its If-None-Match header, never when the
+    representation has no ETag
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if etag is None or not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
@@ -0,0 +1,79 @@
+import asyncio
+import functools
+from functools import lru_cache
+from typing import Any, Callable
+
+import orjson
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from starlette.responses import Response
+
+
+@lru_cache(maxsize=None)
+def _get_field_aliases(model: type[BaseModel]) -> tuple[tuple[str, str], ...]:
+    return tuple(
+        (field_name, field.alias)
+        for field_name, field in model.__fields__.items()
+        if not field.field_info.extra.get("hidden")
+    )
+
+
+def encode_default(value: Any) -> Any:
+    """
+    Encode what orjson does not know natively. Models become shallow dicts by alias without None values, orjson calls
+    back for the models nested in them.
+    """
+    if isinstance(value, BaseModel):
+        values = value.__dict__
+        return {
+            alias: values[field_name]
+            for field_name, alias in _get_field_aliases(type(value))
+            if values.get(field_name) is not None
+        }
+    if isinstance(value, ObjectId):
+        return str(value)
+    return jsonable_encoder(value)
+
+
+def dump_json(content: Any) -> bytes:
+    """
+    Encode models, Beanie documents and raw Motor documents straight to JSON bytes with orjson
+    """
+    return orjson.dumps(content, default=encode_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class DocumentJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
+
+
+class DocumentJSONRoute(APIRoute):
+    """
+    Route sending the models its endpoint returns as a DocumentJSONResponse, skipping the validation against the
+    response model and the jsonable_encoder pass. The response model still documents the route.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        if asyncio.iscoroutinefunction(endpoint):
+            endpoint = self._encode_returned_models(endpoint, kwargs.get("status_code") or 200)
+        super().__init__(path, endpoint, **kwargs)
+
+    @staticmethod
+    def _encode_returned_models(endpoint: Callable[..., Any], status_code: int) -> Callable[..., Any]:
+        @functools.wraps(endpoint)
+        async def encoded_endpoint(*args: Any, **kwargs: Any) -> Any:
+            content = await endpoint(*args, **kwargs)
+            if not isinstance(content, BaseModel):
+                return content
+            response = DocumentJSONResponse(content, status_code=status_code)
+            # FastAPI only applies the headers set on an injected Response when it builds the response itself
+            for value in kwargs.values():
+                if isinstance(value, Response):
+                    response.headers.update(value.headers)
+                    response.status_code = value.status_code or status_code
+            return response
+
+        return encoded_endpoint
@@ -1,4 +1,20 @@
 import logging
+import queue
+import sys
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+import orjson
+
+from app.utils.metrics import LOG_RECORDS_DROPPED
+from app.utils.request_id import request_id_var
+
+CONSOLE_FORMAT = (
+    "Filename: %(filename)s | %(levelname)s | %(asctime)s | Function: [%(funcName)s] | Message: %(message)s"
+    " | LineNumber: %(lineno)s"
+)
 
 
 class ColoredFormatter(logging.Formatter):
@@ -11,32 +27,141 @@ class ColoredFormatter(logging.Formatter):
     def __init__(self, fmt: str):
         super().__init__()
         self.fmt = fmt
-        self.formats = {
-            logging.INFO: self.blue + self.fmt + self.reset,
-            logging.WARNING: self.yellow + self.fmt + self.reset,
-            logging.ERROR: self.red + self.fmt + self.reset,
-            logging.CRITICAL: self.bold_red + self.fmt + self.reset,
+        self.formatters = {
+            level: logging.Formatter(color + self.fmt + self.reset, datefmt="%H:%M %p")
+            for level, color in (
+                (logging.INFO, self.blue),
+                (logging.WARNING, self.yellow),
+                (logging.ERROR, self.red),
+                (logging.CRITICAL, self.bold_red),
+            )
         }
+        self.default_formatter = logging.Formatter(self.fmt, datefmt="%H:%M %p")
 
     def format(self, record) -> str:  # type: ignore
-        log_format = self.formats.get(record.levelno)
-        formatter = logging.Formatter(log_format, datefmt="%H:%M %p")
-        return formatter.format(record)
+        return self.formatters.get(record.levelno, self.default_formatter).format(record)
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    One JSON object per record, with the request id and the traceback when there is one
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc),
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "file": record.filename,
+            "function": record.funcName,
+            "line": record.lineno,
+            "request_id": getattr(record, "request_id", None),
+        }
+        suppressed = getattr(record, "suppressed", None)
+        if suppressed:
+            entry["suppressed"] = suppressed
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry).decode()
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Stamp records with the id of the request being handled, read where the record is created
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Let at most `limit` records per call site through in each interval. The first record let through in the next
+    interval carries how many were suppressed, so a storm of the same error costs one line per call site.
+    """
+
+    def __init__(self, limit: int, interval: float) -> None:
+        super().__init__()
+        self.limit = limit
+        self.interval = interval
+        # (window start, records let through, records suppressed) by call site
+        self._windows: dict[tuple[str, int], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        now = time.monotonic()
+        call_site = (record.pathname, record.lineno)
+        window = self._windows.get(call_site)
+        if window is None or now - window[0] >= self.interval:
+            if window is not None and window[2]:
+                record.suppressed = window[2]
+            window = self._windows[call_site] = [now, 0, 0]
+        if window[1] >= self.limit:
+            window[2] += 1
+            LOG_RECORDS_DROPPED.labels("rate_limited").inc()
+            return False
+        window[1] += 1
+        return True
+
+
+class LocalQueueHandler(QueueHandler):
+    """
+    Hand records to the listener thread as they are, so formatting and tracebacks happen off the event loop.
+    Records are dropped when the queue is full rather than blocking the caller.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.labels("queue_full").inc()
 
 
 class CustomLogger:
     def __init__(self) -> None:
         stdout_handler = logging.StreamHandler()
         stdout_handler.setLevel(logging.INFO)
-        stdout_handler.setFormatter(
-            ColoredFormatter(
-                "Filename: %(filename)s | %(levelname)s | %(asctime)s | Function: [%(funcName)s] | Message: %(message)s"
-                " | LineNumber: %(lineno)s"
-            )
-        )
+        stdout_handler.setFormatter(ColoredFormatter(CONSOLE_FORMAT))
+        stdout_handler.addFilter(RequestIdFilter())
         self.custom_logger = logging.getLogger(__name__)
         self.custom_logger.setLevel(logging.INFO)
         self.custom_logger.addHandler(stdout_handler)
+        self._listener: Optional[QueueListener] = None
+
+    def configure(self, log_format: str, level: str, rate_limit: int, rate_interval: float, queue_size: int) -> None:
+        """
+        Keep the colored console output, or write JSON lines from a background thread with rate limited call sites
+        """
+        self.shutdown()
+        for handler in list(self.custom_logger.handlers):
+            self.custom_logger.removeHandler(handler)
+        self.custom_logger.setLevel(level)
+        if log_format == "console":
+            handler: logging.Handler = logging.StreamHandler()
+            handler.setFormatter(ColoredFormatter(CONSOLE_FORMAT))
+        else:
+            stream_handler = logging.StreamHandler(sys.stdout)
+            stream_handler.setFormatter(JSONFormatter())
+            log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+            self._listener = QueueListener(log_queue, stream_handler)
+            self._listener.start()
+            handler = LocalQueueHandler(log_queue)
+            handler.addFilter(RateLimitFilter(rate_limit, rate_interval))
+        handler.addFilter(RequestIdFilter())
+        self.custom_logger.addHandler(handler)
+
+    def shutdown(self) -> None:
+        """
+        Write out the queued records and stop the listener thread
+        """
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
 
     def info(self, message: str) -> None:
         self.custom_logger.info(
@@ -57,18 +182,29 @@ class CustomLogger:
         )
 
     def error(self, message: str) -> None:
+        # The traceback is only captured while an exception is being handled
         self.custom_logger.error(
             message,
-            exc_info=True,
+            exc_info=sys.exc_info()[0] is not None,
             stacklevel=2,
         )
 
     def critical(self, message: str) -> None:
         self.custom_logger.critical(
             message,
-            exc_info=True,
+            exc_info=sys.exc_info()[0] is not None,
             stacklevel=2,
         )
 
 
+def init_logging(settings) -> None:
+    logger.configure(
+        settings.LOG_FORMAT,
+        settings.LOG_LEVEL,
+        settings.LOG_RATE_LIMIT,
+        settings.LOG_RATE_INTERVAL,
+        settings.LOG_QUEUE_SIZE,
+    )
+
+
 logger = CustomLogger()
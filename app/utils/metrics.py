@@ -0,0 +1,155 @@
+import os
+import time
+from typing import Any
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from pymongo import monitoring
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+UNMATCHED_ROUTE = "unmatched"
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the last byte of its response",
+    ["method", "route", "status"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests being handled",
+    multiprocess_mode="livesum",
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "Size of the response bodies",
+    ["route"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216),
+)
+MONGO_COMMAND_LATENCY = Histogram(
+    "mongo_command_duration_seconds",
+    "Round trip time of the commands sent to Mongo, as measured by the driver",
+    ["command", "status"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+LOG_RECORDS_DROPPED = Counter(
+    "log_records_dropped",
+    "Log records not written, by reason",
+    ["reason"],
+)
+UPLOAD_BYTES = Counter(
+    "storage_upload_bytes",
+    "Bytes written to the storage backend",
+    ["kind"],
+)
+UPLOAD_LATENCY = Histogram(
+    "storage_upload_duration_seconds",
+    "Time to write an object to the storage backend",
+    ["kind", "status"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+
+class MetricsMiddleware:
+    """
+    Record the latency, status and response size of every HTTP request by the name of the route that handled it.
+
+    Routes are told apart by the endpoint the router stores in the scope, so requests that match no route share one
+    label instead of creating a series per path.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._route_names: dict[Any, str] = {}
+        # Labelled children by (endpoint, method, status), labels() validates and locks on every call
+        self._series: dict[tuple, tuple[Any, Any]] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started_at = time.perf_counter()
+        status_code = 500
+        response_size = 0
+
+        async def measured_send(message: Message) -> None:
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, measured_send)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            series_key = (scope.get("endpoint"), scope["method"], status_code)
+            series = self._series.get(series_key)
+            if series is None:
+                route_name = self._get_route_name(scope)
+                series = self._series[series_key] = (
+                    REQUEST_LATENCY.labels(scope["method"], route_name, str(status_code)),
+                    RESPONSE_SIZE.labels(route_name),
+                )
+            series[0].observe(time.perf_counter() - started_at)
+            series[1].observe(response_size)
+
+    def _get_route_name(self, scope: Scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        route_name = self._route_names.get(endpoint)
+        if route_name is None:
+            # Mounts hand their app to the scope as the endpoint, routes their endpoint function
+            self._route_names = {
+                getattr(route, "endpoint", getattr(route, "app", None)): route.name for route in scope["app"].routes
+            }
+            route_name = self._route_names.setdefault(endpoint, getattr(endpoint, "__name__", UNMATCHED_ROUTE))
+        return route_name
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """
+    Record the driver measured latency of every Mongo command by command name and outcome
+    """
+
+    def __init__(self) -> None:
+        self._series: dict[tuple[str, str], Any] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._observe(event.command_name, "success", event.duration_micros)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._observe(event.command_name, "failure", event.duration_micros)
+
+    def _observe(self, command_name: str, status: str, duration_micros: int) -> None:
+        series = self._series.get((command_name, status))
+        if series is None:
+            series = self._series[(command_name, status)] = MONGO_COMMAND_LATENCY.labels(command_name, status)
+        series.observe(duration_micros / 1e6)
+
+
+def metrics_response() -> Response:
+    """
+    Current metrics in the Prometheus text format, merged across the workers when running in multiprocess mode
+    """
+    registry: CollectorRegistry = REGISTRY
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    # Passed as a header, Starlette would append a second charset to a text media type
+    return Response(generate_latest(registry), headers={"Content-Type": CONTENT_TYPE_LATEST})
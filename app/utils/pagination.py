@@ -0,0 +1,81 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, Optional
+
+from bson import ObjectId, json_util
+
+
+class InvalidQueryError(ValueError):
+    """
+    Raised when the cursor, token or fields of a listing or search request cannot be used
+    """
+
+
+def _encode_token(payload: list) -> str:
+    return base64.urlsafe_b64encode(json_util.dumps(payload).encode()).decode().rstrip("=")
+
+
+def _decode_token(token: str) -> Any:
+    padded = token + "=" * (-len(token) % 4)
+    return json_util.loads(base64.urlsafe_b64decode(padded.encode()))
+
+
+def encode_cursor(sort_value: Any, document_id: ObjectId) -> str:
+    """
+    Encode the sort key of the last returned document into an opaque cursor
+    """
+    return _encode_token([sort_value, document_id])
+
+
+def decode_cursor(cursor: str) -> tuple[Any, ObjectId]:
+    """
+    Decode a cursor produced by encode_cursor back into (sort_value, document_id)
+    """
+    try:
+        sort_value, document_id = _decode_token(cursor)
+    except (ValueError, TypeError, binascii.Error) as decode_error:
+        raise InvalidQueryError(f"Invalid cursor: {cursor}") from decode_error
+    if not isinstance(document_id, ObjectId):
+        raise InvalidQueryError(f"Invalid cursor: {cursor}")
+    return sort_value, document_id
+
+
+def encode_change_token(change_seq: int, document_id: Optional[ObjectId], issued_at: datetime) -> str:
+    """
+    Encode a position in the (change_seq, _id) order of the changes and the time it was handed out
+    """
+    return _encode_token([change_seq, document_id, issued_at])
+
+
+def decode_change_token(token: str) -> tuple[int, Optional[ObjectId], datetime]:
+    """
+    Decode a token produced by encode_change_token back into (change_seq, document_id, issued_at)
+    """
+    try:
+        change_seq, document_id, issued_at = _decode_token(token)
+    except (ValueError, TypeError, binascii.Error) as decode_error:
+        raise InvalidQueryError(f"Invalid change token: {token}") from decode_error
+    if (
+        not isinstance(change_seq, int)
+        or not isinstance(document_id, (ObjectId, type(None)))
+        or not isinstance(issued_at, datetime)
+    ):
+        raise InvalidQueryError(f"Invalid change token: {token}")
+    return change_seq, document_id, issued_at
+
+
+def keyset_filter(sort_field: str, direction: int, cursor: Optional[str]) -> dict:
+    """
+    Build the filter selecting documents strictly after the cursor for a (sort_field, _id) ordering
+    """
+    if cursor is None:
+        return {}
+    sort_value, document_id = decode_cursor(cursor)
+    operator = "$gt" if direction > 0 else "$lt"
+    return {
+        "$or": [
+            {sort_field: {operator: sort_value}},
+            {sort_field: sort_value, "_id": {operator: document_id}},
+        ]
+    }
@@ -0,0 +1,40 @@
+import re
+import uuid
+from contextvars import ContextVar
+from typing import Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+REQUEST_ID_HEADER = b"x-request-id"
+REQUEST_ID_PATTERN = re.compile(rb"[A-Za-z0-9._-]{1,128}")
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+class RequestIdMiddleware:
+    """
+    Give every request an id, taken from the X-Request-ID header when the caller sent a valid one, make it available
+    to the logs through a context variable and echo it on the response
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_id = dict(scope["headers"]).get(REQUEST_ID_HEADER)
+        if request_id is None or not REQUEST_ID_PATTERN.fullmatch(request_id):
+            request_id = uuid.uuid4().hex.encode()
+
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (REQUEST_ID_HEADER, request_id)]
+            await send(message)
+
+        token = request_id_var.set(request_id.decode())
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,27 @@
+from typing import AsyncIterator, Union
+
+from pydantic import BaseModel
+from starlette.requests import Request
+from starlette.responses import StreamingResponse
+
+from app.constants import NDJSON_MEDIA_TYPE
+from app.utils.json_response import dump_json
+
+
+def accepts_ndjson(request: Request) -> bool:
+    """
+    Whether the client negotiated a newline delimited JSON stream through the Accept header
+    """
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+async def ndjson_lines(documents: AsyncIterator[Union[BaseModel, dict]]) -> AsyncIterator[bytes]:
+    async for document in documents:
+        yield dump_json(document) + b"\n"
+
+
+def ndjson_response(documents: AsyncIterator[Union[BaseModel, dict]]) -> StreamingResponse:
+    """
+    Write each document to the client as soon as it is read from the cursor, one JSON object per line
+    """
+    return StreamingResponse(ndjson_lines(documents), media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,360 @@
+"""
+Latency and throughput of the API endpoints over a seeded synthetic dataset, driving the ASGI app in process.
+
+    python -m benchmarks.api --dataset 1k
+    python -m benchmarks.api --dataset 100k --mongo-host mongodb://localhost:27017 --output results.json
+    python -m benchmarks.api --dataset 100k --mongo-host mongodb://localhost:27017 --compare results.json
+
+Without --mongo-host the data lives in mongomock-motor, an in-process stand-in for Motor, so the suite runs without a
+network or a server. The stand-in has no $text search, no aggregation expressions in find projections and no $reduce
+in update pipelines, so the search, summary view and label rename scenarios only run against a mongod and are reported
+as skipped otherwise. Its timings show the cost of the application rather than of a database. The 1m dataset needs a
+mongod.
+
+Against a mongod the notes are written to a throwaway database, dropped afterwards unless --keep is given. A kept
+database that already holds the dataset is reused without seeding it again.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional
+
+import httpx
+from bson import ObjectId
+
+from benchmarks.search import make_vocabulary
+
+DATASETS = {"1k": 1000, "100k": 100000, "1m": 1000000}
+LABEL_COUNT = 200
+BATCH_SIZE = 50
+SEED_CHUNK_SIZE = 10000
+BENCHMARK_DATABASE = "GoogleKeepCloneBenchmark"
+
+
+class Dataset:
+    """
+    Synthetic notes with Zipf distributed words and labels, a few labels on most notes and a long tail of rare ones
+    """
+
+    def __init__(self, note_count: int, seed: int) -> None:
+        self.rng = random.Random(seed)
+        self.note_count = note_count
+        self.vocabulary = make_vocabulary(20000, self.rng)
+        self.word_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(self.vocabulary) + 1)))
+        self.labels = {ObjectId(): f"label-{word}" for word in self.vocabulary[:LABEL_COUNT]}
+        self.label_ids = list(self.labels)
+        self.label_weights = list(itertools.accumulate(1 / rank for rank in range(1, LABEL_COUNT + 1)))
+        self.note_ids: list[ObjectId] = []
+
+    def words(self, count: int) -> str:
+        return " ".join(self.rng.choices(self.vocabulary, cum_weights=self.word_weights, k=count))
+
+    def pick_labels(self) -> list[ObjectId]:
+        count = self.rng.choices((0, 1, 2, 3), weights=(20, 45, 25, 10))[0]
+        return list(dict.fromkeys(self.rng.choices(self.label_ids, cum_weights=self.label_weights, k=count)))
+
+    def notes(self, start: int, count: int) -> list[dict]:
+        created_at = datetime.utcnow() - timedelta(days=365)
+        documents = []
+        for position in range(start, start + count):
+            label_ids = self.pick_labels()
+            state = self.rng.random()
+            timestamp = created_at + timedelta(seconds=position * 30)
+            documents.append(
+                {
+                    "_id": ObjectId(),
+                    "created_at": timestamp,
+                    "updated_at": timestamp,
+                    "title": self.words(self.rng.randint(1, 6)),
+                    "notes": self.words(self.rng.randint(5, 120)),
+                    "label_ids": label_ids,
+                    "labels": [self.labels[label_id] for label_id in label_ids],
+                    "images": None,
+                    "background_color_index": str(self.rng.randint(0, 11)),
+                    "background_image_index": None,
+                    "active": state >= 0.05,
+                    "pinned": 0.05 <= state < 0.1,
+                    "archived": 0.1 <= state < 0.2,
+                    "order": position + 1,
+                }
+            )
+        return documents
+
+    async def seed(self, database: Any) -> None:
+        started_at = time.perf_counter()
+        await database.Labels.insert_many(
+            [
+                {"_id": label_id, "label": label, "created_at": datetime.utcnow(), "updated_at": datetime.utcnow()}
+                for label_id, label in self.labels.items()
+            ]
+        )
+        for start in range(0, self.note_count, SEED_CHUNK_SIZE):
+            notes = self.notes(start, min(SEED_CHUNK_SIZE, self.note_count - start))
+            await database.Notes.insert_many(notes, ordered=False)
+            self.note_ids.extend(note["_id"] for note in notes if note["active"])
+        print(f"seeded {self.note_count} notes in {time.perf_counter() - started_at:.1f} s")
+
+    async def load(self, database: Any) -> None:
+        """
+        Read back the ids of a kept dataset instead of seeding it
+        """
+        self.labels = {label["_id"]: label["label"] async for label in database.Labels.find({}, {"label": 1})}
+        self.label_ids = list(self.labels)[:LABEL_COUNT]
+        self.note_ids = [note["_id"] async for note in database.Notes.find({"active": True}, {"_id": 1})]
+        print(f"reusing {len(self.note_ids)} active notes")
+
+    def note_body(self) -> dict:
+        return {
+            "title": self.words(self.rng.randint(1, 6)),
+            "notes": self.words(self.rng.randint(5, 120)),
+            "labels": [self.labels[label_id] for label_id in self.pick_labels()],
+        }
+
+
+def make_scenarios(dataset: Dataset) -> list[tuple[str, int, Callable[[int], dict]]]:
+    """
+    (name, operations per request, request of the i-th call), reads first so they see the seeded dataset unchanged
+    """
+    rng = dataset.rng
+    label_names = dict(dataset.labels)
+
+    def get(path: str, **params: Any) -> Callable[[int], dict]:
+        return lambda _: {"method": "GET", "url": path, "params": params}
+
+    def rename_label(index: int) -> dict:
+        # One label per call so concurrent renames never race on the same label
+        label_id = dataset.label_ids[index % len(dataset.label_ids)]
+        name = label_names[label_id]
+        name = label_names[label_id] = name[: -len("-renamed")] if name.endswith("-renamed") else f"{name}-renamed"
+        return {"method": "PUT", "url": "/api/v1/labels", "json": {"label_id": str(label_id), "label_name": name}}
+
+    return [
+        ("list full", 1, get("/api/v1/notes/", view="full")),
+        ("list summary", 1, get("/api/v1/notes/", view="summary")),
+        ("list fields", 1, get("/api/v1/notes/", fields="title,labels,pinned")),
+        ("list pinned", 1, get("/api/v1/notes/", get_pinned=True)),
+        ("list archived", 1, get("/api/v1/notes/", get_archived=True)),
+        ("list trash", 1, get("/api/v1/notes/", get_trash=True)),
+        ("changes", 1, get("/api/v1/notes/changes")),
+        ("labels", 1, get("/api/v1/labels")),
+        (
+            "label notes",
+            1,
+            lambda _: {
+                "method": "GET",
+                "url": "/api/v1/labels/notes",
+                "params": {"label_id": str(rng.choice(dataset.label_ids)), "view": "full"},
+            },
+        ),
+        (
+            "search",
+            1,
+            lambda _: {"method": "GET", "url": "/api/v1/notes/search", "params": {"search_text": dataset.words(1)}},
+        ),
+        (
+            "suggest",
+            1,
+            lambda _: {
+                "method": "GET",
+                "url": "/api/v1/notes/search/suggest",
+                "params": {"search_text": dataset.words(1)[: rng.randint(3, 6)]},
+            },
+        ),
+        ("create", 1, lambda _: {"method": "POST", "url": "/api/v1/notes", "json": dataset.note_body()}),
+        (
+            f"batch create x{BATCH_SIZE}",
+            BATCH_SIZE,
+            lambda _: {
+                "method": "POST",
+                "url": "/api/v1/notes/batch",
+                "json": {"operations": [{"op": "create", "note": dataset.note_body()} for _ in range(BATCH_SIZE)]},
+            },
+        ),
+        (
+            "update",
+            1,
+            lambda _: {
+                "method": "PUT",
+                "url": "/api/v1/notes",
+                "json": {"note_id": str(rng.choice(dataset.note_ids)), **dataset.note_body()},
+            },
+        ),
+        (
+            f"batch update x{BATCH_SIZE}",
+            BATCH_SIZE,
+            lambda _: {
+                "method": "POST",
+                "url": "/api/v1/notes/batch",
+                "json": {
+                    "operations": [
+                        {"op": "update", "note": {"note_id": str(note_id), **dataset.note_body()}}
+                        for note_id in rng.sample(dataset.note_ids, BATCH_SIZE)
+                    ]
+                },
+            },
+        ),
+        ("label rename", 1, rename_label),
+    ]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    make_request: Callable[[int], dict],
+    operations: int,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+) -> dict:
+    latencies: list[float] = []
+    errors: list[str] = []
+    counter = itertools.count()
+
+    async def worker(total: int, record: bool) -> None:
+        while (index := next(counter)) < total:
+            request = make_request(index)
+            started_at = time.perf_counter()
+            response = await client.request(**request)
+            elapsed = time.perf_counter() - started_at
+            if response.status_code != 200 or response.json().get("status") != "success":
+                errors.append(f"{response.status_code} {response.text[:200]}")
+            elif record:
+                latencies.append(elapsed)
+
+    await asyncio.gather(*(worker(warmup, False) for _ in range(concurrency)))
+    if warmup and len(errors) == warmup:
+        return {"skipped": errors[0]}
+    errors.clear()
+    counter = itertools.count()
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker(requests, True) for _ in range(concurrency)))
+    wall = time.perf_counter() - started_at
+    if len(latencies) < 2:
+        return {"skipped": errors[0] if errors else "too few successful requests"}
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "p50_ms": quantiles[49] * 1000,
+        "p95_ms": quantiles[94] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+        "requests_per_second": len(latencies) / wall,
+        "operations_per_second": len(latencies) * operations / wall,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results: dict, baseline: Optional[dict]) -> None:
+    print(f"{'scenario':<20} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'ops/s':>9}")
+    for name, result in results.items():
+        if "skipped" in result:
+            print(f"{name:<20} skipped: {result['skipped'][:80]}")
+            continue
+        line = (
+            f"{name:<20} {result['p50_ms']:8.2f} {result['p95_ms']:8.2f} {result['p99_ms']:8.2f}"
+            f" {result['requests_per_second']:8.1f} {result['operations_per_second']:9.1f}"
+        )
+        previous = (baseline or {}).get(name)
+        if previous and "skipped" not in previous:
+            p50_change = result["p50_ms"] / previous["p50_ms"] - 1
+            throughput_change = result["requests_per_second"] / previous["requests_per_second"] - 1
+            line += f"   p50 {p50_change:+.0%}  req/s {throughput_change:+.0%}"
+        if result["errors"]:
+            line += f"   {result['errors']} errors"
+        print(line)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", choices=DATASETS, default="1k")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--scenarios", nargs="*", help="only run the scenarios with these names")
+    parser.add_argument("--mongo-host", default=None, help="run against this mongod instead of the stand-in")
+    parser.add_argument("--keep", action="store_true", help="keep the benchmark database for the next run")
+    parser.add_argument("--output", default=None, help="write the results to this JSON file")
+    parser.add_argument("--compare", default=None, help="show the change against a previous JSON output")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from app import app as application
+    from app.config import settings
+    from app.mongo import NoteDocument, create_client, init_mongo, note_search_index
+
+    benchmark_settings = settings.copy(update={"MONGO_DATABASE": BENCHMARK_DATABASE})
+    if args.mongo_host:
+        benchmark_settings = benchmark_settings.copy(update={"MONGO_HOST": args.mongo_host})
+        mongo_client = create_client(benchmark_settings)
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+
+        mongo_client = AsyncMongoMockClient()
+    database = mongo_client[BENCHMARK_DATABASE]
+
+    dataset = Dataset(DATASETS[args.dataset], args.seed)
+    if args.keep and await database.Notes.estimated_document_count() >= dataset.note_count:
+        await dataset.load(database)
+    else:
+        await database.Notes.drop()
+        await database.Labels.drop()
+        await dataset.seed(database)
+    try:
+        started_at = time.perf_counter()
+        await init_mongo(benchmark_settings, mongo_client)
+        # Otherwise built on the first search, the search scenarios measure the built index
+        await note_search_index.rebuild(NoteDocument)
+        print(f"initialized in {time.perf_counter() - started_at:.1f} s")
+
+        results = {}
+        transport = httpx.ASGITransport(app=application, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            for name, operations, make_request in make_scenarios(dataset):
+                if args.scenarios and name not in args.scenarios:
+                    continue
+                results[name] = await run_scenario(
+                    client, make_request, operations, args.requests, args.concurrency, args.warmup
+                )
+    finally:
+        note_search_index.stop()
+        if args.mongo_host and not args.keep:
+            await mongo_client.drop_database(BENCHMARK_DATABASE)
+        mongo_client.close()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+    print_results(results, baseline)
+    if args.output:
+        report = {
+            "commit": git_commit(),
+            "time": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "backend": "mongod" if args.mongo_host else "mongomock-motor",
+            "dataset": args.dataset,
+            "notes": dataset.note_count,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "results": results,
+        }
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,57 @@
+"""
+Images per second rendering the upload variants on a process pool, across worker counts.
+
+    python -m benchmarks.image_variants --images 64 --workers 1 2 4
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from PIL import Image
+
+from app.constants import IMAGE_VARIANT_QUALITY, IMAGE_VARIANT_SIZES
+from app.storage.image_processor import render_variants
+
+
+def make_image(width: int, height: int) -> bytes:
+    """
+    JPEG photo stand-in, noise so the encoders cannot take shortcuts on flat areas
+    """
+    image = Image.merge("RGB", [Image.effect_noise((width, height), 48 + 16 * band) for band in range(3)])
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def images_per_second(images: list[bytes], workers: int) -> float:
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        # Start every worker and import the processing code before timing
+        list(
+            executor.map(render_variants, images[:workers], repeat(IMAGE_VARIANT_SIZES), repeat(IMAGE_VARIANT_QUALITY))
+        )
+        started_at = time.perf_counter()
+        list(executor.map(render_variants, images, repeat(IMAGE_VARIANT_SIZES), repeat(IMAGE_VARIANT_QUALITY)))
+        return len(images) / (time.perf_counter() - started_at)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=32, help="images rendered per worker count")
+    parser.add_argument("--width", type=int, default=3000)
+    parser.add_argument("--height", type=int, default=2000)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    images = [make_image(args.width, args.height)] * args.images
+    print(f"{args.images} images of {args.width}x{args.height}, {len(images[0]) // 1024} KiB each")
+    print(f"{'workers':>8} {'images/s':>10}")
+    for workers in args.workers:
+        print(f"{workers:>8} {images_per_second(images, workers):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Time the metrics middleware adds to a request, measured around a bare ASGI endpoint so nothing else is counted.
+
+    python -m benchmarks.metrics_overhead --requests 100000
+"""
+import argparse
+import asyncio
+import time
+
+from starlette.types import Receive, Scope, Send
+
+from app.utils import MetricsMiddleware, MongoCommandListener
+
+BODY = b'{"status":"success","message":"ok"}'
+
+
+async def endpoint(scope: Scope, receive: Receive, send: Send) -> None:
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": BODY})
+
+
+class Application:
+    """
+    Stands in for the FastAPI app, the middleware reads the route names from its routes
+    """
+
+    def __init__(self) -> None:
+        self.routes = [type("Route", (), {"endpoint": endpoint, "name": "Benchmark route"})()]
+
+
+async def receive() -> dict:
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message: dict) -> None:
+    pass
+
+
+async def time_requests(app, requests: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/benchmark", "app": Application(), "endpoint": endpoint}
+    started_at = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - started_at) / requests
+
+
+def time_mongo_events(events: int) -> float:
+    listener = MongoCommandListener()
+    event = type("Event", (), {"command_name": "find", "duration_micros": 1200})()
+    started_at = time.perf_counter()
+    for _ in range(events):
+        listener.succeeded(event)
+    return (time.perf_counter() - started_at) / events
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100000)
+    args = parser.parse_args()
+
+    bare = await time_requests(endpoint, args.requests)
+    measured = await time_requests(MetricsMiddleware(endpoint), args.requests)
+    print(f"      bare request  {bare * 1e6:6.2f} us")
+    print(f"  measured request  {measured * 1e6:6.2f} us")
+    print(f"   middleware cost  {(measured - bare) * 1e6:6.2f} us per request")
+    print(f"  mongo event cost  {time_mongo_events(args.requests) * 1e6:6.2f} us per command")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
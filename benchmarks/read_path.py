@@ -0,0 +1,94 @@
+"""
+CPU time and allocations per listed note between the Mongo driver and the response bytes, for notes built as models
+and for the raw documents the read queries now hand to the serializer.
+
+    python -m benchmarks.read_path --notes 10000
+
+The raw BSON decoding done by the driver is the same for both paths and is left out. The model path builds the
+NoteProjection model the projected views used, Beanie documents cost more as they also set up their state.
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Callable
+
+from bson import ObjectId
+
+from app.database.projections import NoteProjection, compact
+from app.utils.json_response import dump_json
+
+WORDS = ["groceries", "meeting", "idea", "book", "travel", "call", "todo", "draft", "recipe", "gift", "plan", "later"]
+
+
+def make_documents(count: int, rng: random.Random) -> list[dict]:
+    # Notes as the driver decodes them, with the unset fields stored as null like Beanie writes them
+    created_at = datetime(2024, 1, 1)
+    return [
+        {
+            "_id": ObjectId(),
+            "created_at": created_at + timedelta(minutes=position),
+            "updated_at": created_at + timedelta(minutes=position, seconds=30),
+            "title": " ".join(rng.choices(WORDS, k=rng.randint(1, 5))),
+            "notes": " ".join(rng.choices(WORDS, k=rng.randint(10, 120))),
+            "label_ids": [ObjectId() for _ in range(rng.randint(0, 3))],
+            "labels": rng.sample(WORDS, k=rng.randint(0, 3)),
+            "images": [f"https://example.com/images/{position}.webp"] if rng.random() < 0.3 else None,
+            "background_color_index": str(rng.randint(0, 11)),
+            "background_image_index": None,
+            "active": True,
+            "pinned": rng.random() < 0.1,
+            "archived": False,
+            "order": position,
+        }
+        for position in range(count)
+    ]
+
+
+def model_path(documents: list[dict]) -> bytes:
+    return dump_json([NoteProjection.parse_obj(document) for document in documents])
+
+
+def raw_path(documents: list[dict]) -> bytes:
+    return dump_json([compact(document) for document in documents])
+
+
+def measure(path: Callable[[list[dict]], bytes], documents: list[dict], rounds: int) -> tuple[float, float]:
+    """
+    (microseconds per note, peak KiB allocated per 1000 notes)
+    """
+    path(documents)
+    started_at = time.perf_counter()
+    for _ in range(rounds):
+        path(documents)
+    elapsed = (time.perf_counter() - started_at) / rounds
+
+    tracemalloc.start()
+    path(documents)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / len(documents) * 1e6, peak / len(documents) * 1000 / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    documents = make_documents(args.notes, random.Random(args.seed))
+    if model_path(documents[:100]) != raw_path(documents[:100]):
+        raise SystemExit("The two paths produced different JSON")
+    results = {}
+    for name, path in (("model", model_path), ("raw", raw_path)):
+        results[name] = measure(path, documents, args.rounds)
+        microseconds, peak_kib = results[name]
+        print(f"{name:>6}  {microseconds:7.1f} us/note   peak {peak_kib:8.1f} KiB per 1000 notes")
+    cpu_gain, memory_gain = (model / raw for model, raw in zip(results["model"], results["raw"]))
+    print(f"  gain  {cpu_gain:7.1f}x cpu   {memory_gain:.1f}x memory")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Latency of prefix queries on the in-process search index, and of the same whole word queries on the Mongo $text index.
+
+    python -m benchmarks.search --notes 100000
+    python -m benchmarks.search --notes 100000 --mongo-host mongodb://localhost:27017
+
+The $text part runs only with --mongo-host, it writes the notes to a throwaway database that is dropped afterwards.
+"""
+import argparse
+import asyncio
+import itertools
+import random
+import statistics
+import time
+
+from bson import ObjectId
+
+from app.constants import SEARCH_MAX_PREFIX_EXPANSIONS, SEARCH_MIN_PREFIX_LENGTH
+from app.mongo.note_search_index import NoteSearchIndex
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "ze", "pa", "do", "gu", "ri", "fe", "ba", "mo"]
+
+
+def make_vocabulary(size: int, rng: random.Random) -> list[str]:
+    words: set[str] = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(SYLLABLES, k=rng.randint(2, 5))))
+    return sorted(words, key=lambda _: rng.random())
+
+
+def make_notes(count: int, vocabulary: list[str], rng: random.Random) -> list[dict]:
+    # Zipf distributed words, a few very common and a long tail of rare ones
+    cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(vocabulary) + 1)))
+    return [
+        {
+            "_id": ObjectId(),
+            "title": " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(1, 6))),
+            "notes": " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(5, 60))),
+            "labels": rng.choices(vocabulary[:50], k=rng.randint(0, 3)),
+            "active": True,
+        }
+        for _ in range(count)
+    ]
+
+
+def make_queries(count: int, vocabulary: list[str], rng: random.Random) -> list[tuple[str, str]]:
+    """
+    (prefix query, whole word query) pairs of one or two words, typed up to a random length
+    """
+    queries = []
+    for _ in range(count):
+        words = rng.sample(vocabulary[:2000], k=rng.randint(1, 2))
+        prefix = " ".join(word[: rng.randint(2, len(word))] for word in words)
+        queries.append((prefix, " ".join(words)))
+    return queries
+
+
+def percentiles(timings: list[float]) -> str:
+    quantiles = statistics.quantiles(timings, n=100)
+    return (
+        f"p50 {quantiles[49] * 1000:8.2f} ms   p95 {quantiles[94] * 1000:8.2f} ms   max {max(timings) * 1000:8.2f} ms"
+    )
+
+
+async def bench_index(notes: list[dict], queries: list[tuple[str, str]], limit: int) -> None:
+    index = NoteSearchIndex(
+        check_interval=float("inf"),
+        sync_overlap=0,
+        min_prefix_length=SEARCH_MIN_PREFIX_LENGTH,
+        max_expansions=SEARCH_MAX_PREFIX_EXPANSIONS,
+    )
+    started_at = time.perf_counter()
+    for note in notes:
+        index.put(note["_id"], note["title"], note["notes"], note["labels"])
+    print(f"index built over {len(notes)} notes in {time.perf_counter() - started_at:.1f} s")
+    timings = []
+    for prefix, _ in queries:
+        started_at = time.perf_counter()
+        await index.search(prefix, limit)
+        timings.append(time.perf_counter() - started_at)
+    print(f"{'index prefix':>14}  {percentiles(timings)}")
+
+
+async def bench_text(mongo_host: str, notes: list[dict], queries: list[tuple[str, str]], limit: int) -> None:
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(mongo_host)
+    database = client.GoogleKeepCloneSearchBenchmark
+    try:
+        collection = database.Notes
+        await collection.create_index([("title", "text"), ("notes", "text"), ("labels", "text")])
+        for start in range(0, len(notes), 10000):
+            await collection.insert_many(notes[start : start + 10000], ordered=False)
+        timings = []
+        for _, words in queries:
+            started_at = time.perf_counter()
+            await (
+                collection.find({"$text": {"$search": words}, "active": True}, {"score": {"$meta": "textScore"}})
+                .sort([("score", {"$meta": "textScore"})])
+                .limit(limit)
+                .to_list(limit)
+            )
+            timings.append(time.perf_counter() - started_at)
+        print(f"{'$text words':>14}  {percentiles(timings)}")
+    finally:
+        await client.drop_database(database.name)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=100000)
+    parser.add_argument("--vocabulary", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--mongo-host", default=None, help="also time the $text index on this server")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(args.vocabulary, rng)
+    notes = make_notes(args.notes, vocabulary, rng)
+    queries = make_queries(args.queries, vocabulary, rng)
+    await bench_index(notes, queries, args.limit)
+    if args.mongo_host:
+        await bench_text(args.mongo_host, notes, queries, args.limit)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+"""
+Requests per second of a notes page sent through the default FastAPI route, which validates the returned model against
+the response model and runs jsonable_encoder, and through DocumentJSONRoute, which encodes it with orjson.
+
+    python -m benchmarks.serialization --notes 50 --requests 2000
+
+Both apps run in process through the ASGI transport of httpx, one request at a time, so the figures are per core.
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from beanie import PydanticObjectId
+from fastapi import APIRouter, FastAPI
+
+from app.constants import DEFAULT_ROUTER_SETTINGS
+from app.model import CommonResponseModel
+from app.mongo import NoteDocument
+from app.utils import DocumentJSONRoute
+
+WORDS = ["groceries", "meeting", "idea", "book", "travel", "call", "todo", "draft", "recipe", "gift", "plan", "later"]
+
+
+def make_notes(count: int, rng: random.Random) -> list[NoteDocument]:
+    # Documents as Beanie hands them out, without validation and without a database behind them
+    created_at = datetime(2024, 1, 1)
+    return [
+        NoteDocument.construct(
+            id=PydanticObjectId(),
+            created_at=created_at + timedelta(minutes=position),
+            updated_at=created_at + timedelta(minutes=position, seconds=30),
+            title=" ".join(rng.choices(WORDS, k=rng.randint(1, 5))),
+            notes=" ".join(rng.choices(WORDS, k=rng.randint(10, 120))),
+            label_ids=[PydanticObjectId() for _ in range(rng.randint(0, 3))],
+            labels=rng.sample(WORDS, k=rng.randint(0, 3)),
+            images=[f"https://example.com/images/{position}.webp"] if rng.random() < 0.3 else None,
+            background_color_index=str(rng.randint(0, 11)),
+            active=True,
+            pinned=rng.random() < 0.1,
+            archived=False,
+            order=position,
+        )
+        for position in range(count)
+    ]
+
+
+def make_app(notes: list[NoteDocument]) -> FastAPI:
+    async def get_notes() -> CommonResponseModel:
+        return CommonResponseModel(status="success", message="Notes fetched", data=notes, next_cursor="cursor")
+
+    app = FastAPI()
+    default_router = APIRouter()
+    default_router.get("/notes", **DEFAULT_ROUTER_SETTINGS)(get_notes)
+    document_router = APIRouter(route_class=DocumentJSONRoute)
+    document_router.get("/notes", **DEFAULT_ROUTER_SETTINGS)(get_notes)
+    app.include_router(default_router, prefix="/default")
+    app.include_router(document_router, prefix="/document")
+    return app
+
+
+async def bench(client: httpx.AsyncClient, path: str, requests: int) -> tuple[float, int]:
+    for _ in range(min(requests, 100)):
+        await client.get(path)
+    started_at = time.perf_counter()
+    for _ in range(requests):
+        response = await client.get(path)
+    elapsed = time.perf_counter() - started_at
+    return requests / elapsed, len(response.content)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=50, help="notes per response")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    app = make_app(make_notes(args.notes, random.Random(args.seed)))
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark") as client:
+        default_body = (await client.get("/default/notes")).json()
+        document_body = (await client.get("/document/notes")).json()
+        if default_body != document_body:
+            raise SystemExit("The two routes returned different bodies")
+        results = {}
+        for route in ("default", "document"):
+            results[route] = await bench(client, f"/{route}/notes", args.requests)
+            requests_per_second, body_size = results[route]
+            print(f"{route:>9}  {requests_per_second:8.0f} req/s   {body_size} bytes")
+    print(f"  speedup  {results['document'][0] / results['default'][0]:8.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,142 @@
+"""
+Cold start report: import time of each subsystem, time to import the app, and with a Mongo server the time spent in
+init_beanie and the time until the first request is answered. Each figure is taken in a fresh interpreter.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --mongo-host mongodb://localhost:27017 --ready-budget 3
+
+Exits with status 1 when the median import or ready time exceeds its budget, so it can guard against regressions in CI.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+IMPORT_TIME_PATTERN = re.compile(r"import time:\s+(\d+) \|\s+\d+ \|( *)(\S+)")
+# Seconds to import the app, and to answer the first request from a fresh interpreter
+IMPORT_BUDGET = 1.5
+READY_BUDGET = 3.0
+
+
+def subsystem(module_name: str) -> str:
+    """
+    Group the modules of the app by subpackage and the others by distribution
+    """
+    parts = module_name.split(".")
+    if parts[0] == "app" and len(parts) > 1:
+        return ".".join(parts[:2])
+    return parts[0]
+
+
+def import_report(runs: int) -> tuple[dict[str, float], float]:
+    """
+    (seconds of import time by subsystem, median seconds to import the app)
+    """
+    self_times: dict[str, list[float]] = defaultdict(list)
+    totals = []
+    for _ in range(runs):
+        started_at = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import app"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        totals.append(time.perf_counter() - started_at)
+        run_times: dict[str, float] = defaultdict(float)
+        for match in IMPORT_TIME_PATTERN.finditer(result.stderr):
+            run_times[subsystem(match.group(3))] += int(match.group(1)) / 1e6
+        for name, seconds in run_times.items():
+            self_times[name].append(seconds)
+    return {name: statistics.median(seconds) for name, seconds in self_times.items()}, statistics.median(totals)
+
+
+async def measure_ready() -> dict[str, float]:
+    """
+    Run in the child interpreter: import the app, run its startup hooks and answer a first request
+    """
+    started_at = time.perf_counter()
+    import httpx
+
+    import app.mongo
+    from app import app as application
+
+    timings = {"import": time.perf_counter() - started_at}
+    init_beanie = app.mongo.init_beanie
+
+    async def timed_init_beanie(*args, **kwargs):
+        init_started_at = time.perf_counter()
+        await init_beanie(*args, **kwargs)
+        timings["init_beanie"] = time.perf_counter() - init_started_at
+
+    app.mongo.init_beanie = timed_init_beanie
+    await application.router.startup()
+    timings["startup"] = time.perf_counter() - started_at - timings["import"]
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=application), base_url="http://startup") as client:
+        response = await client.get("/health")
+        response.raise_for_status()
+    timings["ready"] = time.perf_counter() - started_at
+    await application.router.shutdown()
+    return timings
+
+
+def ready_report(mongo_host: str, runs: int) -> dict[str, float]:
+    timings: dict[str, list[float]] = defaultdict(list)
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-m", "benchmarks.startup", "--child"],
+            capture_output=True,
+            text=True,
+            check=True,
+            env={**os.environ, "MONGO_HOST": mongo_host, "STORAGE_BACKEND": "local"},
+        )
+        for name, seconds in json.loads(result.stdout.splitlines()[-1]).items():
+            timings[name].append(seconds)
+    return {name: statistics.median(seconds) for name, seconds in timings.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="subsystems listed")
+    parser.add_argument("--import-budget", type=float, default=IMPORT_BUDGET, help="seconds")
+    parser.add_argument("--ready-budget", type=float, default=READY_BUDGET, help="seconds")
+    parser.add_argument("--mongo-host", default=None, help="also time init_beanie and the first request")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(measure_ready())))
+        return
+
+    over_budget = False
+    import_times, import_total = import_report(args.runs)
+    print(f"import time by subsystem, median of {args.runs} runs")
+    for name, seconds in sorted(import_times.items(), key=lambda item: item[1], reverse=True)[: args.top]:
+        print(f"  {name:<28} {seconds * 1000:8.1f} ms")
+    print(f"import app                     {import_total * 1000:8.1f} ms   budget {args.import_budget * 1000:.0f} ms")
+    over_budget |= import_total > args.import_budget
+
+    if args.mongo_host:
+        timings = ready_report(args.mongo_host, args.runs)
+        print(f"init_beanie                    {timings['init_beanie'] * 1000:8.1f} ms")
+        print(f"startup hooks                  {timings['startup'] * 1000:8.1f} ms")
+        print(
+            f"first request answered         {timings['ready'] * 1000:8.1f} ms"
+            f"   budget {args.ready_budget * 1000:.0f} ms"
+        )
+        over_budget |= timings["ready"] > args.ready_budget
+
+    if over_budget:
+        print("over budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+from mongomock_motor import AsyncMongoMockClient
+
+from app import app
+from app.config import settings
+from app.mongo import init_mongo, note_search_index
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def mongo_client():
+    """
+    Documents initialized on an empty in-process Mongo stand-in, as the benchmarks do without --mongo-host
+    """
+    client = AsyncMongoMockClient()
+    await init_mongo(settings, client)
+    yield client
+    note_search_index.stop()
+    client.close()
+
+
+@pytest.fixture
+async def api(mongo_client):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+def notes_collection(mongo_client):
+    return mongo_client[settings.MONGO_DATABASE].Notes
@@ -0,0 +1,110 @@
+import pytest
+from bson import ObjectId
+
+from app.mongo import NoteDocument
+
+pytestmark = pytest.mark.anyio
+
+BATCH_URL = "/api/v1/notes/batch"
+
+
+async def apply_batch(api, *operations: dict) -> list[dict]:
+    response = (await api.post(BATCH_URL, json={"operations": list(operations)})).json()
+    assert response["status"] == "success"
+    return response["data"]
+
+
+async def test_mixed_batch_returns_a_result_per_operation(api, notes_collection):
+    kept = await NoteDocument(title="kept").insert()
+    trashed = await NoteDocument(title="trashed").insert()
+    removed = await NoteDocument(title="removed").insert()
+
+    results = await apply_batch(
+        api,
+        {"op": "create", "note": {"title": "created", "labels": ["work"]}},
+        {"op": "update", "note": {"note_id": str(kept.id), "title": "renamed"}},
+        {"op": "delete", "note_id": str(trashed.id)},
+        {"op": "delete", "note_id": str(removed.id), "is_permanent": True},
+    )
+
+    assert [(result["index"], result["op"], result["status"]) for result in results] == [
+        (0, "create", "success"),
+        (1, "update", "success"),
+        (2, "delete", "success"),
+        (3, "delete", "success"),
+    ]
+    assert [result["note_id"] for result in results[1:]] == [str(kept.id), str(trashed.id), str(removed.id)]
+    created = await notes_collection.find_one({"_id": ObjectId(results[0]["note_id"])})
+    assert created["title"] == "created" and created["labels"] == ["work"] and len(created["label_ids"]) == 1
+    assert (await notes_collection.find_one({"_id": kept.id}))["title"] == "renamed"
+    assert (await notes_collection.find_one({"_id": trashed.id}))["active"] is False
+    assert await notes_collection.find_one({"_id": removed.id}) is None
+
+
+async def test_update_of_a_missing_note_reports_note_not_found(api):
+    kept = await NoteDocument(title="kept").insert()
+    missing_id = str(ObjectId())
+
+    results = await apply_batch(
+        api,
+        {"op": "update", "note": {"note_id": missing_id, "title": "lost"}},
+        {"op": "update", "note": {"note_id": str(kept.id), "title": "renamed"}},
+    )
+
+    assert results[0] == {
+        "index": 0,
+        "op": "update",
+        "status": "error",
+        "note_id": missing_id,
+        "error": "Note not found",
+    }
+    assert results[1]["status"] == "success"
+
+
+async def test_write_errors_are_reported_on_the_operation_that_caused_them(api, notes_collection):
+    await notes_collection.create_index("title", unique=True, sparse=True)
+    await NoteDocument(title="taken").insert()
+
+    results = await apply_batch(
+        api,
+        # Skipped before the bulk write, so the bulk write indexes no longer match the operation indexes
+        {"op": "update", "note": {"note_id": str(ObjectId()), "title": "lost"}},
+        {"op": "create", "note": {"title": "free"}},
+        {"op": "create", "note": {"title": "taken"}},
+        {"op": "create", "note": {"title": "also free"}},
+    )
+
+    assert [result["status"] for result in results] == ["error", "success", "error", "success"]
+    assert "duplicate" in results[2]["error"].lower()
+    assert await notes_collection.count_documents({"title": {"$in": ["free", "also free"]}}) == 2
+
+
+async def test_creates_get_contiguous_orders_after_the_existing_notes(api, notes_collection):
+    existing = await NoteDocument(title="existing").insert()
+
+    results = await apply_batch(
+        api,
+        {"op": "create", "note": {"title": "first"}},
+        {"op": "delete", "note_id": str(existing.id)},
+        {"op": "create", "note": {"title": "second"}},
+        {"op": "create", "note": {"title": "third"}},
+    )
+
+    created_ids = [ObjectId(result["note_id"]) for result in results if result["op"] == "create"]
+    orders = {note["_id"]: note["order"] async for note in notes_collection.find({"_id": {"$in": created_ids}})}
+    assert [orders[note_id] for note_id in created_ids] == [existing.order + 1, existing.order + 2, existing.order + 3]
+
+
+async def test_only_notes_that_existed_leave_a_tombstone(api, mongo_client, notes_collection):
+    removed = await NoteDocument(title="removed").insert()
+    missing_id = ObjectId()
+
+    results = await apply_batch(
+        api,
+        {"op": "delete", "note_id": str(removed.id), "is_permanent": True},
+        {"op": "delete", "note_id": str(missing_id), "is_permanent": True},
+    )
+
+    assert [result["status"] for result in results] == ["success", "success"]
+    tombstones = await notes_collection.database.Tombstones.find({}).to_list(None)
+    assert [(tombstone["_id"], tombstone["kind"]) for tombstone in tombstones] == [(removed.id, "note")]
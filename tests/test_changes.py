@@ -0,0 +1,182 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from app.config import settings
+from app.constants import (
+    CHANGE_SEQ_BLOCK_LEASE,
+    CHANGES_SETTLE_TIME,
+    CHANGES_TOMBSTONE_TTL,
+)
+from app.database import changes_database
+from app.mongo import init_mongo
+from app.mongo.change_seq_allocator import ChangeSeqAllocator, change_seq_allocator
+from app.mongo.counter_document import CHANGE_SEQ_COUNTER, CounterDocument
+from app.utils import encode_change_token
+
+pytestmark = pytest.mark.anyio
+
+CHANGES_URL = "/api/v1/notes/changes"
+SETTLED_AT = datetime(2023, 7, 1)
+
+
+@pytest.fixture
+def database(mongo_client):
+    return mongo_client[settings.MONGO_DATABASE]
+
+
+def make_note(change_seq: int, updated_at: datetime = SETTLED_AT) -> dict:
+    return {
+        "_id": ObjectId(),
+        "title": f"note {change_seq}",
+        "active": True,
+        "archived": False,
+        "pinned": False,
+        "order": 1,
+        "created_at": updated_at,
+        "updated_at": updated_at,
+        "change_seq": change_seq,
+    }
+
+
+def make_label(change_seq: int) -> dict:
+    return {
+        "_id": ObjectId(),
+        "label": f"label {change_seq}",
+        "created_at": SETTLED_AT,
+        "updated_at": SETTLED_AT,
+        "change_seq": change_seq,
+    }
+
+
+def make_tombstone(change_seq: int, kind: str) -> dict:
+    # Settled, yet recent enough not to be dropped by the tombstone TTL index
+    deleted_at = datetime.utcnow() - timedelta(minutes=1)
+    return {"_id": ObjectId(), "kind": kind, "change_seq": change_seq, "deleted_at": deleted_at}
+
+
+async def get_changes(api, **params) -> tuple[dict, str]:
+    response = (await api.get(CHANGES_URL, params=params)).json()
+    assert response["status"] == "success"
+    return response["data"], response["next_cursor"]
+
+
+def change_ids(data: dict) -> list[str]:
+    return [
+        *(note["_id"] for note in data["notes"]),
+        *(label["_id"] for label in data["labels"]),
+        *(str(note_id) for note_id in data["deleted_notes"]),
+        *(str(label_id) for label_id in data["deleted_labels"]),
+    ]
+
+
+async def test_allocator_reserves_a_block_per_counter_round_trip(mongo_client):
+    allocator = ChangeSeqAllocator(block_size=3, lease=CHANGE_SEQ_BLOCK_LEASE)
+
+    values = [await allocator.next_value() for _ in range(4)]
+
+    assert values == [1, 2, 3, 4]
+    assert (await CounterDocument.get_values([CHANGE_SEQ_COUNTER]))[CHANGE_SEQ_COUNTER] == 6
+
+
+async def test_concurrent_writes_share_one_reservation(mongo_client):
+    allocator = ChangeSeqAllocator(block_size=10, lease=CHANGE_SEQ_BLOCK_LEASE)
+
+    values = await asyncio.gather(*(allocator.next_value() for _ in range(5)))
+
+    assert sorted(values) == [1, 2, 3, 4, 5]
+    assert (await CounterDocument.get_values([CHANGE_SEQ_COUNTER]))[CHANGE_SEQ_COUNTER] == 10
+
+
+async def test_allocator_stops_using_a_block_after_its_lease(mongo_client):
+    allocator = ChangeSeqAllocator(block_size=3, lease=0.05)
+
+    first_value = await allocator.next_value()
+    await asyncio.sleep(0.1)
+
+    assert (first_value, await allocator.next_value()) == (1, 4)
+
+
+async def test_init_on_another_database_reserves_a_new_block(mongo_client):
+    await change_seq_allocator.next_value()
+    other_client = AsyncMongoMockClient()
+
+    await init_mongo(settings, other_client)
+
+    assert await change_seq_allocator.next_value() == 1
+    other_client.close()
+
+
+def test_settle_time_covers_the_block_lease():
+    # A value handed out at the end of a lease must still be younger than the settle time when it is written
+    assert CHANGES_SETTLE_TIME > CHANGE_SEQ_BLOCK_LEASE
+
+
+async def test_changes_of_every_kind_come_in_change_seq_then_id_order(api, database):
+    # Created in the reverse order of the merge, so changes sharing a change_seq are ordered by _id across kinds
+    tombstones = [make_tombstone(1, "note"), make_tombstone(4, "label"), make_tombstone(3, "note")]
+    labels = [make_label(2), make_label(3)]
+    notes = [make_note(1), make_note(3), make_note(3)]
+    await database.Notes.insert_many(notes)
+    await database.Labels.insert_many(labels)
+    await database.Tombstones.insert_many(tombstones)
+
+    received_ids, since = [], None
+    for _ in range(len(notes) + len(labels) + len(tombstones)):
+        data, since = await get_changes(api, limit=1, **({"since": since} if since else {}))
+        received_ids.extend(change_ids(data))
+        if not data["has_more"]:
+            break
+
+    expected = sorted([*notes, *labels, *tombstones], key=lambda change: (change["change_seq"], change["_id"]))
+    assert received_ids == [str(change["_id"]) for change in expected]
+
+
+async def test_token_stays_before_changes_that_have_not_settled(api, database, monkeypatch):
+    settled_note, recent_note = make_note(1), make_note(3, updated_at=datetime.utcnow())
+    await database.Notes.insert_many([settled_note, recent_note])
+
+    data, since = await get_changes(api)
+    assert change_ids(data) == [str(settled_note["_id"]), str(recent_note["_id"])]
+
+    # Reserved its sequence before the recent note but became visible after it
+    late_note = make_note(2, updated_at=datetime.utcnow())
+    await database.Notes.insert_one(late_note)
+    data, since = await get_changes(api, since=since)
+    assert change_ids(data) == [str(late_note["_id"]), str(recent_note["_id"])]
+
+    monkeypatch.setattr(changes_database, "CHANGES_SETTLE_TIME", 0)
+    data, since = await get_changes(api, since=since)
+    assert change_ids(data) == [str(late_note["_id"]), str(recent_note["_id"])]
+    data, since = await get_changes(api, since=since)
+    assert change_ids(data) == []
+
+
+async def test_token_older_than_the_tombstones_is_rejected(api):
+    expired_token = encode_change_token(0, None, datetime.utcnow() - timedelta(seconds=CHANGES_TOMBSTONE_TTL))
+
+    response = (await api.get(CHANGES_URL, params={"since": expired_token})).json()
+
+    assert response["status"] == "failure"
+    assert "expired" in response["message"]
+
+
+async def test_has_more_while_the_token_reached_the_end_of_a_full_page(api, database):
+    await database.Notes.insert_many([make_note(change_seq) for change_seq in (1, 2, 3)])
+
+    data, since = await get_changes(api, limit=2)
+    assert len(data["notes"]) == 2 and data["has_more"]
+
+    data, since = await get_changes(api, limit=2, since=since)
+    assert len(data["notes"]) == 1 and not data["has_more"]
+
+
+async def test_no_more_while_the_page_has_changes_that_have_not_settled(api, database):
+    await database.Notes.insert_many([make_note(1), make_note(2, updated_at=datetime.utcnow()), make_note(3)])
+
+    data, _ = await get_changes(api, limit=2)
+
+    assert len(data["notes"]) == 2 and not data["has_more"]
@@ -0,0 +1,94 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from app.mongo import notes_document
+
+pytestmark = pytest.mark.anyio
+
+NOTES_URL = "/api/v1/notes/"
+NOTE_URL = "/api/v1/notes"
+
+
+@pytest.fixture
+async def settled_notes(notes_collection) -> list[dict]:
+    notes = [
+        {
+            "_id": ObjectId(),
+            "title": f"note {order}",
+            "active": True,
+            "archived": False,
+            "pinned": False,
+            "order": order,
+            "created_at": datetime(2023, 7, 1),
+            "updated_at": datetime(2023, 7, 1),
+            "change_seq": 0,
+        }
+        for order in range(3)
+    ]
+    await notes_collection.insert_many(notes)
+    return notes
+
+
+async def get_etag(api, url: str = NOTES_URL, **params) -> str:
+    response = await api.get(url, params=params)
+    assert response.status_code == 200
+    return response.headers["ETag"]
+
+
+async def test_unchanged_notes_get_a_304(api, settled_notes):
+    etag = await get_etag(api)
+
+    response = await api.get(NOTES_URL, headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+
+async def test_query_is_part_of_the_etag(api, settled_notes):
+    assert await get_etag(api) != await get_etag(api, fields="title")
+    assert await get_etag(api) != await get_etag(api, "/api/v1/labels/notes", label_id=str(ObjectId()))
+
+
+async def test_no_etag_while_the_last_write_has_not_settled(api, settled_notes):
+    await api.put(NOTE_URL, json={"note_id": str(settled_notes[0]["_id"]), "title": "renamed"})
+
+    response = await api.get(NOTES_URL, headers={"If-None-Match": "*"})
+
+    assert response.status_code == 200
+    assert "ETag" not in response.headers
+
+
+@pytest.mark.parametrize(
+    "write",
+    [
+        lambda api, note_id: api.put(NOTE_URL, json={"note_id": note_id, "title": "renamed"}),
+        lambda api, note_id: api.delete(NOTE_URL, params={"note_id": note_id}),
+        lambda api, note_id: api.delete(NOTE_URL, params={"note_id": note_id, "is_permanent": True}),
+    ],
+    ids=["update", "trash", "permanent delete"],
+)
+async def test_settled_write_changes_the_etag(api, settled_notes, monkeypatch, write):
+    etag = await get_etag(api)
+    monkeypatch.setattr(notes_document, "CHANGES_SETTLE_TIME", 0)
+
+    assert (await write(api, str(settled_notes[0]["_id"]))).json()["status"] == "success"
+
+    response = await api.get(NOTES_URL, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+async def test_expired_tombstone_does_not_bring_back_an_older_etag(api, settled_notes, notes_collection, monkeypatch):
+    etag = await get_etag(api)
+    monkeypatch.setattr(notes_document, "CHANGES_SETTLE_TIME", 0)
+    await api.delete(NOTE_URL, params={"note_id": str(settled_notes[0]["_id"]), "is_permanent": True})
+
+    # One tombstone expiry period later the tombstone is gone and the newest remaining write is older than the tag
+    await notes_collection.database.Tombstones.delete_many({})
+    expired_at = notes_document.time.time() + notes_document.CHANGES_TOMBSTONE_TTL
+    monkeypatch.setattr(notes_document.time, "time", lambda: expired_at)
+
+    response = await api.get(NOTES_URL, headers={"If-None-Match": etag})
+    assert response.status_code == 200
@@ -0,0 +1,88 @@
+import asyncio
+import hashlib
+
+import pytest
+
+from app.mongo import ImageDocument
+from app.storage import LocalStorageBackend, upload_executor
+
+pytestmark = pytest.mark.anyio
+
+UPLOAD_URL = "/api/v1/image/upload"
+
+
+@pytest.fixture
+def stored_objects(tmp_path) -> list[str]:
+    """
+    Local storage in a temporary directory, recording the name of every object written to it
+    """
+    written_names = []
+    backend = LocalStorageBackend(str(tmp_path), "/media")
+    write = backend.write
+
+    def recorded_write(name, chunks, content_type):
+        written_names.append(name)
+        return write(name, chunks, content_type)
+
+    backend.write = recorded_write
+    upload_executor.configure(backend, max_concurrency=2, chunk_size=1024, max_size=1024 * 1024)
+    yield written_names
+    upload_executor.shutdown()
+
+
+async def upload(api, content: bytes, filename: str = "photo.png") -> dict:
+    response = (await api.post(UPLOAD_URL, files={"file": (filename, content, "image/png")})).json()
+    assert response["status"] == "success"
+    return response["data"]
+
+
+async def test_same_content_is_stored_once(api, stored_objects):
+    content = b"not really a png" * 200
+
+    first = await upload(api, content)
+    second = await upload(api, content, filename="copy.png")
+
+    digest = hashlib.sha256(content).hexdigest()
+    assert first == second
+    assert first["image_id"] == digest
+    assert stored_objects == [f"images/{digest}.png"]
+    assert await ImageDocument.count() == 1
+
+
+async def test_concurrent_uploads_of_the_same_content_share_one_transfer(api, stored_objects):
+    content = b"not really a png" * 200
+
+    results = await asyncio.gather(*[upload(api, content) for _ in range(3)])
+
+    assert all(result == results[0] for result in results)
+    assert len(stored_objects) == 1
+    assert await ImageDocument.count() == 1
+
+
+async def test_different_content_is_stored_separately(api, stored_objects):
+    first = await upload(api, b"first image")
+    second = await upload(api, b"second image")
+
+    assert first["image_id"] != second["image_id"]
+    assert len(stored_objects) == 2
+    assert await ImageDocument.count() == 2
+
+
+async def test_image_registered_by_another_process_meanwhile_is_returned(api, stored_objects, monkeypatch):
+    content = b"not really a png" * 200
+    digest = hashlib.sha256(content).hexdigest()
+    # Registered by another process after this one found no image under the digest
+    await ImageDocument(id=digest, url="/media/elsewhere.png", key="images/elsewhere.png", size=len(content)).insert()
+    get = ImageDocument.get
+    lookups = []
+
+    async def missed_first_lookup(document_id, *args, **kwargs):
+        lookups.append(document_id)
+        return None if len(lookups) == 1 else await get(document_id, *args, **kwargs)
+
+    monkeypatch.setattr(ImageDocument, "get", missed_first_lookup)
+
+    result = await upload(api, content)
+
+    assert result["image_url"] == "/media/elsewhere.png"
+    assert await ImageDocument.count() == 1
@@ -0,0 +1,87 @@
+import pytest
+
+from app.database import LabelDatabase
+from app.mongo import LabelDocument, label_cache
+from app.mongo.counter_document import LABELS_VERSION_COUNTER, CounterDocument
+
+pytestmark = pytest.mark.anyio
+
+LABELS_URL = "/api/v1/labels"
+
+
+@pytest.fixture
+def labels_collection(mongo_client):
+    return LabelDocument.get_motor_collection()
+
+
+async def rename_elsewhere(labels_collection, label_id, label_name: str) -> None:
+    """
+    Rename a label the way another process does, writing to Mongo and bumping the version without this cache
+    """
+    await labels_collection.update_one({"_id": label_id}, {"$set": {"label": label_name}})
+    await CounterDocument.next_value(LABELS_VERSION_COUNTER)
+
+
+async def get_label_names(api) -> list[str]:
+    response = (await api.get(LABELS_URL)).json()
+    assert response["status"] == "success"
+    return sorted(label["label"] for label in response["data"])
+
+
+async def test_local_rename_is_served_from_the_cache_right_away(api, monkeypatch):
+    async def rename_in_notes(*args, **kwargs):
+        return 0
+
+    monkeypatch.setattr(LabelDocument, "rename_in_notes", rename_in_notes)
+    monkeypatch.setattr(label_cache, "check_interval", 60)
+    label_ids = await LabelDocument.resolve_ids(["home"])
+
+    await api.put(LABELS_URL, json={"label_id": str(label_ids["home"]), "label_name": "house"})
+
+    assert await label_cache.get_ids(["home", "house"]) == {"house": label_ids["home"]}
+    assert await get_label_names(api) == ["house"]
+
+
+async def test_local_delete_is_evicted_from_the_cache_right_away(api, monkeypatch):
+    monkeypatch.setattr(label_cache, "check_interval", 60)
+    label_ids = await LabelDocument.resolve_ids(["home", "work"])
+
+    await api.delete(LABELS_URL, params={"label_id": str(label_ids["home"])})
+
+    assert await label_cache.get_ids(["home", "work"]) == {"work": label_ids["work"]}
+    assert await get_label_names(api) == ["work"]
+
+
+async def test_change_made_elsewhere_is_picked_up_after_the_check_interval(labels_collection, monkeypatch):
+    label_ids = await LabelDocument.resolve_ids(["home"])
+    monkeypatch.setattr(label_cache, "check_interval", 60)
+
+    await rename_elsewhere(labels_collection, label_ids["home"], "house")
+
+    assert await label_cache.get_ids(["home", "house"]) == {"home": label_ids["home"]}
+    monkeypatch.setattr(label_cache, "check_interval", 0)
+    assert await label_cache.get_ids(["home", "house"]) == {"house": label_ids["home"]}
+
+
+async def test_local_write_after_a_change_made_elsewhere_still_reloads(labels_collection, monkeypatch):
+    label_ids = await LabelDocument.resolve_ids(["home"])
+    monkeypatch.setattr(label_cache, "check_interval", 60)
+
+    await rename_elsewhere(labels_collection, label_ids["home"], "house")
+    # The local write bumps the version too, it must not hide the version the other process wrote
+    label_ids.update(await LabelDocument.resolve_ids(["work"]))
+
+    monkeypatch.setattr(label_cache, "check_interval", 0)
+    assert await label_cache.get_ids(["home", "house", "work"]) == {
+        "house": label_ids["home"],
+        "work": label_ids["work"],
+    }
+
+
+async def test_labels_are_read_from_mongo_when_the_cache_holds_only_part_of_them(mongo_client, monkeypatch):
+    await LabelDocument.resolve_ids(["home", "work", "travel"])
+    monkeypatch.setattr(label_cache, "max_size", 2)
+    await label_cache.warm(LabelDocument)
+
+    assert await label_cache.get_all() is None
+    assert sorted(label["label"] for label in await LabelDatabase.get_all_labels()) == ["home", "travel", "work"]
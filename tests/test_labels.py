@@ -0,0 +1,42 @@
+import pytest
+
+from app.mongo import LabelDocument, NoteDocument
+
+pytestmark = pytest.mark.anyio
+
+LABELS_URL = "/api/v1/labels"
+
+
+async def fail_rename(*args, **kwargs):
+    raise AssertionError("Notes were renamed")
+
+
+async def test_rename_to_a_taken_name_is_rejected_before_the_notes_change(api, notes_collection, monkeypatch):
+    monkeypatch.setattr(LabelDocument, "rename_in_notes", fail_rename)
+    label_ids = await LabelDocument.resolve_ids(["work", "home"])
+    note = await NoteDocument(title="note", labels=["home"], label_ids=[label_ids["home"]]).insert()
+
+    response = await api.put(LABELS_URL, json={"label_id": str(label_ids["home"]), "label_name": "work"})
+
+    assert response.json()["status"] == "failure"
+    assert (await LabelDocument.get(label_ids["home"])).label == "home"
+    assert (await notes_collection.find_one({"_id": note.id}))["labels"] == ["home"]
+
+
+async def test_name_taken_after_the_lookup_is_rejected_before_the_notes_change(api, monkeypatch):
+    monkeypatch.setattr(LabelDocument, "rename_in_notes", fail_rename)
+    label_ids = await LabelDocument.resolve_ids(["work", "home"])
+    find_one = LabelDocument.find_one
+
+    def find_one_missing_name(query, *args, **kwargs):
+        # The name lookup misses, as when another request creates the label right after it
+        if "label" in query:
+            query = {"_id": None}
+        return find_one(query, *args, **kwargs)
+
+    monkeypatch.setattr(LabelDocument, "find_one", staticmethod(find_one_missing_name))
+
+    response = await api.put(LABELS_URL, json={"label_id": str(label_ids["home"]), "label_name": "work"})
+
+    assert response.json()["status"] == "failure"
+    assert (await LabelDocument.get(label_ids["home"])).label == "home"
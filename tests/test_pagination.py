@@ -0,0 +1,76 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+pytestmark = pytest.mark.anyio
+
+NOTES_URL = "/api/v1/notes/"
+
+
+def make_note(**fields) -> dict:
+    now = datetime(2023, 7, 1)
+    return {
+        "_id": ObjectId(),
+        "title": "note",
+        "active": True,
+        "archived": False,
+        "pinned": False,
+        "order": 1,
+        "created_at": now,
+        "updated_at": now,
+        "change_seq": 0,
+        **fields,
+    }
+
+
+async def read_all_pages(api, limit: int, **params) -> list[str]:
+    note_ids, cursor = [], None
+    # More pages than notes means the cursor stopped moving forward
+    for _ in range(20):
+        page_params = {**params, "limit": limit}
+        if cursor:
+            page_params["cursor"] = cursor
+        response = (await api.get(NOTES_URL, params=page_params)).json()
+        assert response["status"] == "success"
+        note_ids.extend(note["_id"] for note in response["data"])
+        cursor = response.get("next_cursor")
+        if cursor is None:
+            return note_ids
+    raise AssertionError(f"Paging did not end, read {len(note_ids)} notes")
+
+
+async def test_pages_return_every_note_once_when_order_ties(api, notes_collection):
+    notes = [make_note(order=index // 4) for index in range(10)]
+    await notes_collection.insert_many(notes)
+
+    note_ids = await read_all_pages(api, limit=3)
+
+    assert sorted(note_ids) == sorted(str(note["_id"]) for note in notes)
+
+
+async def test_pages_return_every_note_once_when_updated_at_ties(api, notes_collection):
+    notes = [make_note(active=False) for _ in range(7)]
+    await notes_collection.insert_many(notes)
+
+    note_ids = await read_all_pages(api, limit=2, get_trash=True)
+
+    assert sorted(note_ids) == sorted(str(note["_id"]) for note in notes)
+
+
+async def test_pages_follow_the_order_of_the_view(api, notes_collection):
+    notes = [make_note(order=order) for order in (3, 1, 2, 1)]
+    await notes_collection.insert_many(notes)
+
+    note_ids = await read_all_pages(api, limit=3)
+
+    expected = sorted(notes, key=lambda note: (note["order"], note["_id"]))
+    assert note_ids == [str(note["_id"]) for note in expected]
+
+
+@pytest.mark.parametrize("cursor", ["garbage", "W10", "WzEsIDJd"])
+async def test_malformed_cursor_gets_the_failure_response(api, cursor):
+    response = await api.get(NOTES_URL, params={"cursor": cursor})
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "failure"
@@ -0,0 +1,32 @@
+import pytest
+from bson import ObjectId
+
+from app.database import NotesDatabase
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize(
+    "url, params",
+    [
+        ("/api/v1/notes/", {"fields": "title,secret"}),
+        ("/api/v1/notes/", {"get_trash": True, "get_pinned": True}),
+        ("/api/v1/notes/changes", {"since": "garbage"}),
+        ("/api/v1/labels/notes", {"label_id": str(ObjectId()), "fields": "secret"}),
+    ],
+)
+async def test_invalid_queries_get_the_failure_response(api, url, params):
+    response = await api.get(url, params=params)
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "failure"
+
+
+async def test_other_value_errors_are_not_reported_as_invalid_queries(api, monkeypatch):
+    async def broken_read(*args, **kwargs):
+        raise ValueError("not a query problem")
+
+    monkeypatch.setattr(NotesDatabase, "get_all_notes", broken_read)
+
+    with pytest.raises(ValueError, match="not a query problem"):
+        await api.get("/api/v1/notes/")
@@ -0,0 +1,61 @@
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from app.config import settings
+from app.database import NotesDatabase
+from app.mongo import NoteDocument, init_mongo, note_search_index
+
+pytestmark = pytest.mark.anyio
+
+SUGGEST_URL = "/api/v1/notes/search/suggest"
+
+
+@pytest.fixture
+def text_index_searches(monkeypatch) -> list[str]:
+    """
+    Searches answered by the text index, which the Mongo stand-in does not support
+    """
+    search_texts = []
+
+    async def suggest_with_text_index(search_text, *args, **kwargs):
+        search_texts.append(search_text)
+        return [], None
+
+    monkeypatch.setattr(NotesDatabase, "_suggest_with_text_index", suggest_with_text_index)
+    return search_texts
+
+
+async def suggest(api, search_text: str) -> list[str]:
+    response = (await api.get(SUGGEST_URL, params={"search_text": search_text})).json()
+    assert response["status"] == "success"
+    return [note["title"] for note in response["data"]]
+
+
+async def test_index_is_not_built_at_startup(mongo_client):
+    assert not note_search_index.ready
+    assert note_search_index._rebuild_task is None
+
+
+async def test_first_search_builds_the_index_in_the_background(api, text_index_searches):
+    await NoteDocument(title="grocery list").insert()
+
+    assert await suggest(api, "groc") == []
+    assert text_index_searches == ["groc"]
+
+    await note_search_index._rebuild_task
+    assert await suggest(api, "groc") == ["grocery list"]
+    assert text_index_searches == ["groc"]
+
+
+async def test_init_on_another_database_drops_the_built_index(api, text_index_searches):
+    await NoteDocument(title="grocery list").insert()
+    await suggest(api, "groc")
+    await note_search_index._rebuild_task
+
+    other_client = AsyncMongoMockClient()
+    await init_mongo(settings, other_client)
+
+    assert await suggest(api, "groc") == []
+    await note_search_index._rebuild_task
+    assert await suggest(api, "groc") == []
+    other_client.close()
@@ -0,0 +1,28 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from benchmarks.startup import IMPORT_BUDGET, READY_BUDGET, import_report, ready_report
+
+ROOT = Path(__file__).resolve().parent.parent
+RUNS = 3
+
+
+@pytest.fixture(autouse=True)
+def run_from_root(monkeypatch):
+    # The fresh interpreters import the app and the benchmark from the working directory
+    monkeypatch.chdir(ROOT)
+
+
+def test_import_within_budget():
+    _, import_total = import_report(RUNS)
+    assert import_total < IMPORT_BUDGET, f"importing the app took {import_total:.2f}s, budget {IMPORT_BUDGET}s"
+
+
+@pytest.mark.skipif("MONGO_HOST" not in os.environ, reason="needs a Mongo server in MONGO_HOST")
+def test_first_request_within_budget():
+    timings = ready_report(os.environ["MONGO_HOST"], RUNS)
+    assert (
+        timings["ready"] < READY_BUDGET
+    ), f"first request answered after {timings['ready']:.2f}s, budget {READY_BUDGET}s"